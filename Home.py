@@ -1,8 +1,9 @@
 import streamlit as st
-import pandas as pd
 
 from utils import (
-    initialize_session_state, get_tricks_df, get_completed_tricks
+    CATEGORIES, TRICK_TYPES,
+    initialize_session_state, profile_section, display_profiling_panel, display_trick_links,
+    HOME_QUERY_PARAMS, home_query_params, get_trick_index, get_search_index, get_completed_tricks
 )
 
 # Set page config
@@ -12,32 +13,118 @@ st.set_page_config(page_title="Tricky", layout="wide", initial_sidebar_state="co
 initialize_session_state()
 
 # Load the global data
-df_tricks = get_tricks_df()
+trick_index = get_trick_index()
+search_index = get_search_index()
 completed_tricks = get_completed_tricks()
+completed_bits = trick_index.completed_bits(completed_tricks['completed'])
+
+# Grid layout: links per row, page size choices, and the catalog size above which categories start collapsed
+COLUMNS_PER_ROW = 4
+PAGE_SIZES = [12, 24, 48, 96]
+DEFAULT_PAGE_SIZE = 24
+EXPAND_ALL_LIMIT = 200
+
+# Small catalogs start with every category open; big ones start collapsed
+EXPAND_BY_DEFAULT = len(trick_index.tricks) <= EXPAND_ALL_LIMIT
+
+
+# Function to bring back the page's state from the URL (or from before switching to another page)
+def restore_home_state():
+    """Set the search, filter, paging and category widgets from the HOME_QUERY_PARAMS, once per visit"""
+    params = st.session_state.pop("home_query_params", None)
+    if params is None:
+        # Reruns keep their own widget state; a new visit (a trick link, Back or a bookmark) starts from its URL
+        if "grid_page_size" in st.session_state:
+            return
+        params = home_query_params()
+
+    # The URL can be edited by hand, so anything that doesn't parse falls back to the default
+    st.session_state.trick_search = params.get("q", [""])[0]
+    trick_type = params.get("type", [""])[0]
+    st.session_state.trick_type = trick_type if trick_type in TRICK_TYPES else "All Tricks"
+    per_page = params.get("per_page", [""])[0]
+    st.session_state.grid_page_size = int(per_page) if per_page in map(str, PAGE_SIZES) else DEFAULT_PAGE_SIZE
+
+    st.session_state.grid_pages = {}
+    for value in params.get("more", []):
+        pages, _, grid_key = value.partition(":")
+        if pages.isdigit() and grid_key:
+            st.session_state.grid_pages[grid_key] = int(pages)
+
+    toggled = params.get("toggled", [])
+    st.session_state.open_categories = {
+        category: EXPAND_BY_DEFAULT != (category in toggled) for category in CATEGORIES
+    }
+
+
+# Function to get the page's current state as HOME_QUERY_PARAMS (defaults are left out to keep URLs short)
+def current_home_params():
+    params = {
+        "q": [st.session_state.get("trick_search", "")],
+        "type": [st.session_state.get("trick_type", "All Tricks")],
+        "per_page": [str(st.session_state.get("grid_page_size", DEFAULT_PAGE_SIZE))],
+        "more": [f"{pages}:{grid_key}" for grid_key, pages in st.session_state.grid_pages.items() if pages > 1],
+        "toggled": [category for category in CATEGORIES
+                    if st.session_state.open_categories.get(category, EXPAND_BY_DEFAULT) != EXPAND_BY_DEFAULT],
+    }
+    defaults = {"q": [""], "type": ["All Tricks"], "per_page": [str(DEFAULT_PAGE_SIZE)], "more": [], "toggled": []}
+    return {key: values for key, values in params.items() if values != defaults[key]}
+
+
+# Function to keep the URL in step with the page, so Back and reloads come back to the same page
+def save_home_state():
+    params = current_home_params()
+    for key in HOME_QUERY_PARAMS:
+        # Only touch the params that changed, since every write is sent to the browser
+        if params.get(key, []) != st.query_params.get_all(key):
+            if key in params:
+                st.query_params[key] = params[key]
+            else:
+                del st.query_params[key]
 
-# Main page content (Home page)
-def main():
 
-    # Handle trick selection with a callback function
-    def store_trick_selection(trick_name, difficulty):
-        """Store the selected trick info in session state without navigation"""
-        st.session_state.selected_trick = trick_name
-        st.session_state.selected_difficulty = difficulty
-        st.session_state.redirect_to_page = "pages/Trick_Page.py"
+# Function to show one more page of a grid section
+def show_more(grid_key):
+    st.session_state.grid_pages[grid_key] = st.session_state.grid_pages.get(grid_key, 1) + 1
 
-    st.markdown("<h1 style='text-align: center;'>Tricky</h1>", unsafe_allow_html=True)
 
-    st.markdown(
-        "<p style='text-align: center;'>ℹ️ Note: For demonstration purposes, the <strong>Ollie</strong> and <strong>Kickflip</strong> trick pages have been fully updated with proper video content. Every other trick page contains placeholder messages.</p>",
-        unsafe_allow_html=True
-    )
+# Function to remember whether a category section is open (kept across type filters, and in the URL)
+def toggle_category(category):
+    st.session_state.open_categories[category] = st.session_state[f"open_{category}"]
+
 
-    # Clear search before rendering input
-    if st.session_state.get("clear_search_now"):
-        st.session_state.trick_search = ""
-        st.session_state.clear_search_now = False
-        st.rerun()
+# Function to start a new search back on its first page
+def reset_search_pages():
+    st.session_state.grid_pages.pop("search", None)
 
+
+# Function to render a paginated grid of trick links
+def display_trick_grid(tricks, grid_key, page_size):
+    """Render the first pages of tricks as links, with a "Show more" button for the rest"""
+    num_shown = min(len(tricks), st.session_state.grid_pages.get(grid_key, 1) * page_size)
+    # The links carry the page state as of this section's last run (the URL itself is always up to date)
+    display_trick_links(tricks[:num_shown], trick_index, completed_bits, columns=COLUMNS_PER_ROW,
+                        home_params=current_home_params())
+
+    # Only the shown page(s) are rendered, so each rerun stays bounded however big the catalog is
+    if num_shown < len(tricks):
+        st.button(
+            f"Show more ({len(tricks) - num_shown} more)",
+            key=f"show_more_{grid_key}",
+            on_click=show_more,
+            args=(grid_key,)
+        )
+
+
+# Function to empty the search box (runs before the box is rendered again)
+def clear_search():
+    st.session_state.trick_search = ""
+    reset_search_pages()
+
+
+# Search box and its results; typing, clearing or paging search results only reruns this fragment
+@st.fragment
+def display_search(page_size):
     # Modified search container section
     search_container = st.container()
     with search_container:
@@ -47,10 +134,11 @@ def main():
         col1, col2, col3 = st.columns([0.3, 1, 0.2])
 
         with col1:
-            search_query = st.text_input("Search for tricks",
-                                         placeholder="Enter trick name...",
-                                         label_visibility="collapsed",
-                                         key="trick_search")
+            st.text_input("Search for tricks",
+                          placeholder="Enter trick name...",
+                          label_visibility="collapsed",
+                          key="trick_search",
+                          on_change=reset_search_pages)
 
         with col2:
             # Add custom CSS to fix vertical alignment
@@ -64,9 +152,7 @@ def main():
             </style>
             """, unsafe_allow_html=True)
 
-            if st.button(":material/close:", key="clear_search", help="Clear search"):
-                st.session_state.clear_search_now = True
-                st.rerun()
+            st.button(":material/close:", key="clear_search", help="Clear search", on_click=clear_search)
 
         with col3:
             # Apply the same vertical alignment fix
@@ -82,170 +168,103 @@ def main():
             """, unsafe_allow_html=True)
 
             if st.button("Your Progress :chart_with_upwards_trend: :material/arrow_forward:", key="your_progress_btn"):
+                # switch_page drops the query params, so keep them for the way back
+                st.session_state.home_query_params = current_home_params()
                 st.switch_page("pages/Your_Progress.py")
 
     # Add a thinner separator after the search bar with custom styling
     st.markdown("<hr style='margin-top:0rem; margin-bottom:1.5rem; height:1px'>", unsafe_allow_html=True)
 
     # Display search results as a full-width category section BEFORE the regular categories
-    if 'trick_search' in st.session_state and st.session_state.trick_search:
-        search_query = st.session_state.trick_search
-        # Filter tricks based on search query
-        search_results = df_tricks[df_tricks['Trick'].str.lower().str.contains(search_query.lower())]
-        if not search_results.empty:
-            st.subheader(f"Search Results for '{search_query}'")
-            st.text("")
-            # Use the same columns_per_row constant as in the categories display
-            columns_per_row = 4
-
-            # Calculate how many rows we need
-            num_results = len(search_results)
-            num_rows = (num_results + columns_per_row - 1) // columns_per_row
-
-            # Create buttons in rows - same format as in category display
-            for row in range(num_rows):
-                cols = st.columns(columns_per_row)
-
-                # Add buttons to each column
-                for col_idx in range(columns_per_row):
-                    result_idx = row * columns_per_row + col_idx
-
-                    # Check if we have a result for this position
-                    if result_idx < num_results:
-                        trick = search_results.iloc[result_idx]
-
-                        # Check if this trick is completed
-                        is_completed = trick['Trick'] in completed_tricks['completed']
-
-                        # Create a centered container for the button
-                        with cols[col_idx]:
-                            # Create button with trick name and green checkmark if completed
-                            button_text = f"{trick['Trick']}"
-                            if is_completed:
-                                button_text = f"{trick['Trick']} ✅"
-
-                            if st.button(
-                                    button_text,
-                                    key=f"search_{trick['Trick']}_{trick['Difficulty']}",
-                                    use_container_width=True,
-                                    on_click=store_trick_selection,
-                                    args=(trick['Trick'], trick['Difficulty'])
-                            ):
-                                pass  # The callback handles the navigation
-        else:
-            # Show this message if no results found
-            st.subheader(f"Search Results for '{search_query}'")
-            st.info("No tricks found matching your search.")
+    search_query = st.session_state.get("trick_search")
+    if search_query:
+        with profile_section("home.search"):
+            # Look up matching tricks (literal, with a typo-tolerant fallback), best matches first
+            search_results = [trick_index.get_trick(name) for name in search_index.search(search_query)]
+            if search_results:
+                st.subheader(f"Search Results for '{search_query}'")
+                st.text("")
+                display_trick_grid(search_results, "search", page_size)
+            else:
+                # Show this message if no results found
+                st.subheader(f"Search Results for '{search_query}'")
+                st.info("No tricks found matching your search.")
 
         # Add a separator after search results
         st.markdown("---")
 
-    # Add trick type filter
-    st.markdown("<p style='margin-bottom: 0.25rem;'>Filter by Trick Type</p>", unsafe_allow_html=True)
-    trick_type = st.radio(
-        "Show tricks by type:",
-        ["All Tricks", "Flip Tricks", "Shove-Its & Spins", "Ollie-Based Tricks", "Other"],
-        label_visibility="collapsed",
-        horizontal=True
-    )
-
-    # Define function to determine trick type based on name
-    def get_trick_type(trick_name):
-        trick_name_lower = trick_name.lower()
-
-        if 'flip' in trick_name_lower or 'heel' in trick_name_lower:
-            return "Flip Tricks"
-        elif 'shove' in trick_name_lower or 'shov' in trick_name_lower or 'spin' in trick_name_lower or '360' in trick_name_lower or '180' in trick_name_lower or 'rotation' in trick_name_lower:
-            return "Shove-Its & Spins"
-        elif 'ollie' in trick_name_lower:
-            return "Ollie-Based Tricks"
-        else:
-            return "Other"
-
-    # Create a section for each category
-    categories = [
-        "Beginner",
-        "Easy",
-        "Intermediate",
-        "Advanced",
-        "Expert"
-    ]
-
-    # Display buttons for each category
-    for category in categories:
-        st.subheader(category)
-        st.text("")
-
-        # Get tricks for this category
-        category_tricks = df_tricks[df_tricks['Category'] == category]
-
-        # Apply trick type filter if not "All Tricks"
-        if trick_type != "All Tricks":
-            # Filter based on trick type
-            filtered_tricks = []
-            for _, trick in category_tricks.iterrows():
-                if get_trick_type(trick['Trick']) == trick_type:
-                    filtered_tricks.append(trick)
-
-            # Convert filtered list back to DataFrame
-            if filtered_tricks:
-                category_tricks = pd.DataFrame(filtered_tricks)
-            else:
-                category_tricks = pd.DataFrame(columns=category_tricks.columns)
-
-        # Skip empty categories after filtering
-        if len(category_tricks) == 0:
-            st.info(f"No {trick_type} tricks found in {category} category.")
-            continue
+    save_home_state()
+
+
+# Type filter, page size and category sections; their widgets only rerun this fragment
+@st.fragment
+def display_category_grid(page_size):
+    # Add trick type filter and page size
+    filter_col, page_size_col = st.columns([1, 0.2])
+    with filter_col:
+        st.markdown("<p style='margin-bottom: 0.25rem;'>Filter by Trick Type</p>", unsafe_allow_html=True)
+        trick_type = st.radio(
+            "Show tricks by type:",
+            ["All Tricks"] + TRICK_TYPES,
+            label_visibility="collapsed",
+            horizontal=True,
+            key="trick_type"
+        )
+
+    with page_size_col:
+        # The search results are paged with this too, so a new page size reruns the whole page
+        if st.selectbox("Tricks per page", PAGE_SIZES, key="grid_page_size") != page_size:
+            st.rerun()
+
+    with profile_section("home.category_grid"):
+        # Display buttons for each category
+        for category in CATEGORIES:
+            st.subheader(category)
+
+            # Get the precomputed (already type-filtered) tricks for this category
+            category_tricks = trick_index.get_tricks(category, trick_type)
+
+            # Skip empty categories after filtering
+            if len(category_tricks) == 0:
+                st.info(f"No {trick_type} tricks found in {category} category.")
+                continue
+
+            # Collapsed categories render no buttons at all
+            if not st.toggle(f"Show {len(category_tricks)} tricks",
+                             value=st.session_state.open_categories.get(category, EXPAND_BY_DEFAULT),
+                             key=f"open_{category}", on_change=toggle_category, args=(category,)):
+                continue
 
+            st.text("")
+            display_trick_grid(category_tricks, f"{category}:{trick_type}", page_size)
 
-        # Create columns for the buttons
-        columns_per_row = 4
+    # Add a separator between categories
+    st.markdown("---")
 
-        # Calculate how many rows we need
-        num_tricks = len(category_tricks)
-        num_rows = (num_tricks + columns_per_row - 1) // columns_per_row
+    save_home_state()
 
-        # Create buttons in rows
-        for row in range(num_rows):
-            cols = st.columns(columns_per_row)
 
-            # Add buttons to each column
-            for col_idx in range(columns_per_row):
-                trick_idx = row * columns_per_row + col_idx
+# Main page content (Home page)
+def main():
 
-                # Check if we have a trick for this position
-                if trick_idx < num_tricks:
-                    trick = category_tricks.iloc[trick_idx]
+    st.markdown("<h1 style='text-align: center;'>Tricky</h1>", unsafe_allow_html=True)
 
-                    # Check if this trick is completed
-                    is_completed = trick['Trick'] in completed_tricks['completed']
+    st.markdown(
+        "<p style='text-align: center;'>ℹ️ Note: For demonstration purposes, the <strong>Ollie</strong> and <strong>Kickflip</strong> trick pages have been fully updated with proper video content. Every other trick page contains placeholder messages.</p>",
+        unsafe_allow_html=True
+    )
 
-                    # Create a centered container for the button
-                    with cols[col_idx]:
-                        # Create button with trick name and green checkmark if completed
-                        button_text = f"{trick['Trick']}"
-                        if is_completed:
-                            button_text = f"{trick['Trick']} ✅"
+    # Search, filter and paging come back from the URL (trick links load a new session)
+    restore_home_state()
 
-                        if st.button(
-                                button_text,
-                                key=f"{trick['Trick']}_{trick['Difficulty']}",
-                                use_container_width=True,
-                                on_click=store_trick_selection,
-                                args=(trick['Trick'], trick['Difficulty'])
-                        ):
-                            pass  # The callback handles the navigation
+    # Number of tricks shown per section before "Show more"
+    page_size = st.session_state.get("grid_page_size", DEFAULT_PAGE_SIZE)
 
-    # Add a separator between categories
-    st.markdown("---")
+    display_search(page_size)
+    display_category_grid(page_size)
 
 
 # Run the main function
 if __name__ == "__main__":
     main()
-
-if 'redirect_to_page' in st.session_state and st.session_state.redirect_to_page:
-    page = st.session_state.redirect_to_page
-    st.session_state.redirect_to_page = None  # Clear to prevent infinite loop
-    st.switch_page(page)
\ No newline at end of file
+    display_profiling_panel()
@@ -0,0 +1,372 @@
+"""Headless JSON API for the trick catalog and progress.
+
+A plain ASGI app (no framework needed) that serves the same data as the
+Streamlit pages, built by the same loaders in utils.py:
+
+    GET /tricks?category=&type=&limit=&cursor=   catalog, one page at a time
+    GET /tricks/{name}                            one trick
+    GET /tricks/{name}/videos                     a trick's videos
+    GET /search?q=&limit=                         trick name search
+    GET /users/{user_id}/progress                 a user's completed tricks
+
+Run it with any ASGI server, e.g. ``uvicorn api:app``.
+
+Progress is private: its requests need ``Authorization: Bearer <token>``
+with a token signed by TRICKY_API_SECRET for that same user, e.g.
+
+    TRICKY_API_SECRET=... python api.py token alice@example.com --days 30
+"""
+import argparse
+import asyncio
+import base64
+import binascii
+import functools
+import gzip
+import hashlib
+import hmac
+import json
+import logging
+import os
+import time
+from bisect import bisect_right
+from urllib.parse import parse_qs, unquote
+
+from hot_reload import SnapshotReloader
+from utils import CATEGORIES, TRICK_TYPES, GLOBAL_DATA_FILES, build_global_data, open_progress_store
+
+
+logger = logging.getLogger(__name__)
+
+# Page sizes for the catalog and search endpoints
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+# Responses smaller than this aren't worth compressing
+GZIP_MIN_BYTES = 1024
+
+CATALOG_CACHE_CONTROL = "public, max-age=60"
+PROGRESS_CACHE_CONTROL = "private, no-cache"
+
+# Secret that progress tokens are signed with; without it the progress endpoint is disabled
+API_SECRET = os.environ.get("TRICKY_API_SECRET", "")
+
+DEFAULT_TOKEN_DAYS = 30
+
+
+# Error that is turned into a JSON error response
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+# Function to get the catalog reloader, created once per process
+@functools.cache
+def get_reloader():
+    """Load the global data once and reload it in the background whenever its files change"""
+    return SnapshotReloader(build_global_data, GLOBAL_DATA_FILES)
+
+
+# Function to get the progress store, opened once per process
+@functools.cache
+def get_store():
+    """Open the same progress store the Streamlit app uses"""
+    return open_progress_store()
+
+
+# Functions to turn catalog entries into JSON-ready dicts
+def trick_to_json(trick):
+    name, difficulty, category, types = trick
+    return {"name": name, "difficulty": difficulty, "category": category, "types": list(types)}
+
+
+def clip_to_json(clip):
+    if clip is None:
+        return None
+    return {"url": clip.url, "video_id": clip.video_id, "start_time": clip.start_time,
+            "end_time": clip.end_time, "name": clip.name}
+
+
+# Function to fingerprint a catalog snapshot's trick order, the same in every worker that loaded the same files
+@functools.lru_cache(maxsize=2)
+def catalog_tag(index):
+    return hashlib.blake2b(json.dumps(index.tricks).encode(), digest_size=6).hexdigest()
+
+
+# Functions for opaque pagination cursors ("<catalog tag>:<catalog position of the last trick on the page>");
+# positions only mean something in the catalog they came from, so a cursor from before a reload is rejected
+def encode_cursor(index, position):
+    return base64.urlsafe_b64encode(f"{catalog_tag(index)}:{position}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(index, cursor):
+    try:
+        tag, position = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().split(":")
+        position = int(position)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ApiError(400, "Invalid cursor")
+    if tag != catalog_tag(index):
+        raise ApiError(400, "The catalog changed since this cursor was issued; start again from the first page")
+    return position
+
+
+# Functions for progress tokens: "<base64 JSON [user_id, expiry]>.<base64 HMAC-SHA256 of that>"
+def b64encode(data):
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def sign_token(user_id, secret, expires_at):
+    """Issue a token that lets its holder read user_id's progress until expires_at (Unix time)"""
+    payload = b64encode(json.dumps([user_id, int(expires_at)], separators=(",", ":")).encode())
+    signature = hmac.new(secret.encode(), payload.encode(), hashlib.sha256).digest()
+    return f"{payload}.{b64encode(signature)}"
+
+
+def token_user(token, secret, now=None):
+    """Get the user a token was signed for, or None if it's malformed, forged or expired"""
+    payload, _, signature = token.partition(".")
+    expected = hmac.new(secret.encode(), payload.encode(), hashlib.sha256).digest()
+    try:
+        if not hmac.compare_digest(b64decode(signature), expected):
+            return None
+        user_id, expires_at = json.loads(b64decode(payload))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        return None
+    if expires_at < (time.time() if now is None else now):
+        return None
+    return user_id
+
+
+# Function to check that a request may read a user's progress
+def require_user(request_headers, user_id):
+    if not API_SECRET:
+        raise ApiError(403, "Progress is disabled: set TRICKY_API_SECRET to enable it")
+    scheme, _, token = request_headers.get(b"authorization", b"").decode("latin-1").partition(" ")
+    signed_user = token_user(token.strip(), API_SECRET) if scheme.lower() == "bearer" else None
+    if signed_user is None:
+        raise ApiError(401, "A valid bearer token is required")
+    # A token only ever unlocks its own user's progress
+    if signed_user != user_id:
+        raise ApiError(403, "This token can't read that user's progress")
+
+
+# Function to read a single query parameter
+def query_param(query, name, default=None):
+    values = query.get(name)
+    return values[-1] if values else default
+
+
+# Function to read the page size parameter
+def parse_limit(query):
+    limit = query_param(query, "limit", str(DEFAULT_LIMIT))
+    if not limit.isdigit() or not 1 <= int(limit) <= MAX_LIMIT:
+        raise ApiError(400, f"limit must be a whole number from 1 to {MAX_LIMIT}")
+    return int(limit)
+
+
+# Function to get the tricks matching the catalog filters, in catalog (difficulty) order
+def filtered_tricks(index, category, trick_type):
+    if category is not None and category not in CATEGORIES:
+        raise ApiError(400, f"category must be one of: {', '.join(CATEGORIES)}")
+    if trick_type not in ["All Tricks"] + TRICK_TYPES:
+        raise ApiError(400, f"type must be one of: {', '.join(TRICK_TYPES)}")
+
+    if category is not None:
+        return index.get_tricks(category, trick_type)
+    if trick_type == "All Tricks":
+        return index.tricks
+    # Categories are difficulty ranges, so their buckets joined in order stay in catalog order
+    return tuple(trick for category in CATEGORIES for trick in index.get_tricks(category, trick_type))
+
+
+# Endpoint handlers: each gets the query and request headers (plus any path arguments)
+# and returns (JSON body, Cache-Control)
+async def list_tricks(query, request_headers):
+    index = get_reloader().get()["trick_index"]
+    tricks = filtered_tricks(index, query_param(query, "category"), query_param(query, "type", "All Tricks"))
+    limit = parse_limit(query)
+
+    # The cursor is the catalog position of the previous page's last trick, so the
+    # next page starts right after it in the filtered list
+    start = 0
+    cursor = query_param(query, "cursor")
+    if cursor:
+        start = bisect_right(tricks, decode_cursor(index, cursor), key=lambda trick: index.positions[trick[0]])
+
+    page = tricks[start:start + limit]
+    next_cursor = None
+    if start + limit < len(tricks):
+        next_cursor = encode_cursor(index, index.positions[page[-1][0]])
+    return {"tricks": [trick_to_json(trick) for trick in page], "next_cursor": next_cursor}, CATALOG_CACHE_CONTROL
+
+
+# Function to check that a trick from the URL exists
+def require_trick(index, trick_name):
+    if trick_name not in index.positions:
+        raise ApiError(404, f"No trick named {trick_name!r}")
+    return index.get_trick(trick_name)
+
+
+async def get_trick(query, request_headers, trick_name):
+    trick = require_trick(get_reloader().get()["trick_index"], trick_name)
+    return trick_to_json(trick), CATALOG_CACHE_CONTROL
+
+
+async def get_trick_videos(query, request_headers, trick_name):
+    snapshot = get_reloader().get()
+    require_trick(snapshot["trick_index"], trick_name)
+
+    videos = snapshot["video_data"].get(trick_name)
+    return {
+        "trick": trick_name,
+        "slow_motion": clip_to_json(videos.slow_motion),
+        "pro_examples": [clip_to_json(clip) for clip in videos.pro_examples],
+        "tutorial": videos.tutorial.url if videos.tutorial else None
+    }, CATALOG_CACHE_CONTROL
+
+
+async def search_tricks(query, request_headers):
+    search_query = query_param(query, "q", "")
+    limit = parse_limit(query)
+    snapshot = get_reloader().get()
+    names = snapshot["search_index"].search(search_query) if search_query else ()
+    results = [trick_to_json(snapshot["trick_index"].get_trick(name)) for name in names[:limit]]
+    return {"query": search_query, "results": results}, CATALOG_CACHE_CONTROL
+
+
+async def get_progress(query, request_headers, user_id):
+    require_user(request_headers, user_id)
+    # Store reads may block (SQLite), so keep them off the event loop
+    completed = await asyncio.to_thread(get_store().get_completed, user_id)
+    return {"user": user_id, "completed": completed}, PROGRESS_CACHE_CONTROL
+
+
+# (path segments, handler); "{}" matches any one segment, which is passed to the handler
+ROUTES = [
+    (("tricks",), list_tricks),
+    (("tricks", "{}"), get_trick),
+    (("tricks", "{}", "videos"), get_trick_videos),
+    (("search",), search_tricks),
+    (("users", "{}", "progress"), get_progress),
+]
+
+
+# Function to find the handler for a path
+def match_route(path):
+    """Return (handler, path arguments), or (None, None) if nothing matches"""
+    # Split before unquoting so names containing "/" (as %2F) still form one segment
+    segments = [unquote(segment) for segment in path.strip("/").split("/")]
+    for pattern, handler in ROUTES:
+        if len(pattern) != len(segments):
+            continue
+        args = []
+        for expected, segment in zip(pattern, segments):
+            if expected == "{}":
+                args.append(segment)
+            elif expected != segment:
+                break
+        else:
+            return handler, args
+    return None, None
+
+
+# Function to build the response: ETag, conditional 304 and gzip
+def build_response(status, payload, cache_control, request_headers):
+    """Return (status, headers, body) for a JSON payload"""
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+
+    headers = [
+        (b"content-type", b"application/json; charset=utf-8"),
+        (b"cache-control", cache_control.encode()),
+        (b"vary", b"Accept-Encoding"),
+    ]
+    use_gzip = len(body) >= GZIP_MIN_BYTES and "gzip" in request_headers.get(b"accept-encoding", b"").decode("latin-1")
+
+    if status == 200:
+        # Strong ETag over the uncompressed body, so every worker agrees on it;
+        # the compressed bytes differ, so the gzip variant gets its own tag
+        etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + ('-gzip"' if use_gzip else '"')
+        headers.append((b"etag", etag.encode()))
+
+        if_none_match = request_headers.get(b"if-none-match", b"").decode("latin-1")
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if etag in tags or "*" in tags:
+            return 304, headers, b""
+
+    if use_gzip:
+        body = gzip.compress(body, compresslevel=6)
+        headers.append((b"content-encoding", b"gzip"))
+    headers.append((b"content-length", str(len(body)).encode()))
+    return status, headers, body
+
+
+async def handle_http(scope, receive, send):
+    request_headers = dict(scope["headers"])
+    path = scope.get("raw_path", scope["path"].encode()).decode("latin-1").split("?", 1)[0]
+
+    try:
+        if scope["method"] not in ("GET", "HEAD"):
+            raise ApiError(405, "Only GET is supported")
+        handler, args = match_route(path)
+        if handler is None:
+            raise ApiError(404, "Not found")
+        query = parse_qs(scope["query_string"].decode("latin-1"))
+        payload, cache_control = await handler(query, request_headers, *args)
+        status = 200
+    except ApiError as error:
+        status, payload, cache_control = error.status, {"error": error.message}, "no-store"
+    except Exception:
+        logger.exception("Error handling %s", path)
+        status, payload, cache_control = 500, {"error": "Internal server error"}, "no-store"
+
+    status, headers, body = build_response(status, payload, cache_control, request_headers)
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": b"" if scope["method"] == "HEAD" else body})
+
+
+async def handle_lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            try:
+                # Load the catalog up front so the first request doesn't pay for it
+                await asyncio.to_thread(get_reloader)
+                await asyncio.to_thread(get_store)
+            except Exception as error:
+                await send({"type": "lifespan.startup.failed", "message": str(error)})
+                return
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            get_store().close()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+# The ASGI entry point
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await handle_lifespan(receive, send)
+    elif scope["type"] == "http":
+        await handle_http(scope, receive, send)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Issue progress tokens for the JSON API")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    token_parser = subparsers.add_parser("token", help="sign a token for one user (needs TRICKY_API_SECRET)")
+    token_parser.add_argument("user_id", help="the user's progress key (their sign-in email, or \"default\")")
+    token_parser.add_argument("--days", type=float, default=DEFAULT_TOKEN_DAYS, help="how long the token is valid")
+    args = parser.parse_args()
+
+    if not API_SECRET:
+        parser.error("TRICKY_API_SECRET is not set")
+    print(sign_token(args.user_id, API_SECRET, time.time() + args.days * 86400))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+"""Load-test one server process with many concurrent sessions.
+
+Runs N simulated users at once, each an AppTest session on its own thread
+(the way a Streamlit server runs each session's script on its own thread),
+against a synthetic catalog. Every user repeats a realistic journey: type
+a search on Home, open a trick page, tick and untick "I can do this
+trick!", filter by trick type and look at Your Progress. Replays are not
+part of the journey: the player component replays in the browser, so they
+never reach the server.
+
+Reports reruns per second, p50/p99 rerun latency, resident memory growth,
+and how long calls into the shared global data and progress store took
+under load (compare a sweep of session counts to see the contention).
+If any session fails, its load level reports the errors instead of numbers,
+no higher levels run, and the script exits non-zero.
+
+    python benchmarks/load_test.py --sessions 1 8 32 --journeys 5
+    python benchmarks/load_test.py --sessions 16 --backend json --no-write-behind
+"""
+import argparse
+import functools
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from unittest.mock import MagicMock, patch
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import streamlit as st  # noqa: E402
+from streamlit.runtime import Runtime  # noqa: E402
+from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager  # noqa: E402
+from streamlit.runtime.media_file_manager import MediaFileManager  # noqa: E402
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage  # noqa: E402
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache  # noqa: E402
+from streamlit.testing.v1 import AppTest, app_test, local_script_runner  # noqa: E402
+from streamlit.testing.v1.util import patch_config_options  # noqa: E402
+
+from render_benchmark import make_catalog, reset_app_caches, write_catalog  # noqa: E402
+
+
+# Page scripts a journey visits
+PAGES = ["Home.py", "pages/Trick_Page.py", "pages/Your_Progress.py"]
+
+# Search prefixes typed one keystroke at a time
+SEARCH_TERMS = ["kickflip", "heel", "grind", "360", "manual"]
+
+
+# Function to get the nearest-rank percentile of sorted values
+def percentile(values, fraction):
+    return values[int(fraction * (len(values) - 1))] if values else 0.0
+
+
+# Thread-safe record of how long each kind of call took
+class Timings:
+    """Collect durations (in seconds) by name from many threads"""
+
+    def __init__(self):
+        self.durations = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            self.durations.setdefault(name, []).append(seconds)
+
+    def wrap(self, name, func):
+        """Return func, timed under the given name"""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - start)
+        return wrapper
+
+    def summary(self):
+        """Get count, p50, p99, max and total (in ms) for each name"""
+        with self._lock:
+            snapshot = {name: sorted(durations) for name, durations in self.durations.items()}
+        return {
+            name: {
+                "count": len(durations),
+                "p50_ms": round(percentile(durations, 0.5) * 1000, 3),
+                "p99_ms": round(percentile(durations, 0.99) * 1000, 3),
+                "max_ms": round(durations[-1] * 1000, 3),
+                "total_s": round(sum(durations), 3),
+            }
+            for name, durations in sorted(snapshot.items())
+        }
+
+
+# Function to get this process's current resident memory
+def resident_memory_bytes():
+    """Current RSS from /proc where available, otherwise the peak RSS so far"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is in kilobytes on Linux but bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+# Function to time the shared resources every session goes through
+def instrument_shared_resources(timings):
+    """Time pinning the global data snapshot and every progress store/history call; returns an undo function"""
+    import utils
+
+    patched = []
+
+    def time_calls(owner, name, label):
+        original = getattr(owner, name)
+        setattr(owner, name, timings.wrap(label, original))
+        patched.append((owner, name, original))
+
+    # Pinning goes through the cache_resource lookup and the reloader every session shares
+    time_calls(utils, "pin_global_data", "global data: pin snapshot")
+
+    # The store and history are process-wide singletons, so timing their methods covers every session
+    store = utils.get_progress_store()
+    time_calls(store, "get_completed", "progress store: get_completed")
+    time_calls(store, "set_completed", "progress store: set_completed")
+    history = utils.get_progress_history()
+    time_calls(history, "record", "progress history: record")
+    time_calls(history, "history", "progress history: history")
+
+    def undo():
+        for owner, name, original in reversed(patched):
+            if isinstance(owner, type(utils)):
+                setattr(owner, name, original)
+            else:
+                # Instance patches shadow the class method; removing them restores it
+                delattr(owner, name)
+    return undo
+
+
+# Function to make AppTest behave like one server process running many sessions
+@contextmanager
+def shared_test_runtime():
+    """Share one mock Runtime, one config patch and one script bytecode cache across every session's runs
+
+    AppTest sets these process-wide things up for each run and tears them down when the run ends, which is
+    only safe one run at a time. With runs overlapping, a finishing run would pull them out from under the
+    others: its Runtime goes away, and undoing its config patch turns "global.appTest" off for runs still in
+    flight, so their widgets never register with the test (the KeyError: '$$ID-...' failures). Here they are
+    set up once for the whole load level instead, and each session keeps only its own session state.
+    """
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+
+    # AppTest also recompiles the page scripts on every run; a server compiles each one once.
+    # Compile them up front, since parsing from many threads at once isn't safe on every Python version
+    script_cache = ScriptCache()
+    for script in PAGES:
+        script_cache.get_bytecode(os.path.join(REPO_DIR, script))
+
+    with patch_config_options({"global.appTest": True}), \
+            patch.object(app_test, "patch_config_options", lambda overrides: nullcontext()), \
+            patch.object(app_test, "MagicMock", lambda spec: runtime), \
+            patch.object(Runtime, "instance", classmethod(lambda cls: runtime)), \
+            patch.object(Runtime, "exists", classmethod(lambda cls: True)), \
+            patch.object(app_test, "ScriptCache", lambda: script_cache), \
+            patch.object(local_script_runner, "ScriptCache", lambda: script_cache):
+        yield
+
+
+# One simulated user: a single session that navigates between pages like a browser tab would
+class SimulatedSession:
+    """Drive one AppTest session through the journey, timing every rerun"""
+
+    def __init__(self, session_id, trick_names, timings, think_time, timeout, seed=0):
+        self.rng = random.Random(seed * 1000 + session_id)
+        self.trick_names = trick_names
+        self.timings = timings
+        self.think_time = think_time
+        self.at = AppTest.from_file(os.path.join(REPO_DIR, "Home.py"), default_timeout=timeout)
+
+    def rerun(self, action):
+        """Rerun the script and record its latency under the action's name"""
+        start = time.perf_counter()
+        self.at.run()
+        self.timings.record(action, time.perf_counter() - start)
+        if self.at.exception:
+            raise RuntimeError(f"{action} raised: {self.at.exception[0].value}")
+        if self.think_time:
+            time.sleep(self.rng.uniform(0, 2 * self.think_time))
+
+    def open_page(self, script, action, **query):
+        self.at.switch_page(script)
+        self.at.query_params.clear()
+        for key, value in query.items():
+            self.at.query_params[key] = value
+        self.rerun(action)
+
+    def journey(self):
+        self.open_page("Home.py", "open home")
+
+        # Search, one keystroke per rerun
+        term = self.rng.choice(SEARCH_TERMS)
+        for length in range(1, len(term) + 1):
+            self.at.text_input(key="trick_search").input(term[:length])
+            self.rerun("search keystroke")
+        self.at.button(key="clear_search").click()
+        self.rerun("clear search")
+
+        # Open a trick page and toggle "Mark as Learned" there and back
+        trick_name = self.rng.choice(self.trick_names)
+        self.open_page("pages/Trick_Page.py", "open trick page", trick=trick_name)
+        checkbox = self.at.checkbox(key=f"completed_{trick_name}")
+        checkbox.set_value(not checkbox.value)
+        self.rerun("toggle learned")
+        checkbox = self.at.checkbox(key=f"completed_{trick_name}")
+        checkbox.set_value(not checkbox.value)
+        self.rerun("toggle learned")
+
+        # Back home to browse by trick type, then check progress
+        self.open_page("Home.py", "open home")
+        self.at.radio[0].set_value(self.rng.choice(self.at.radio[0].options[1:]))
+        self.rerun("type filter")
+        self.open_page("pages/Your_Progress.py", "open your progress")
+
+
+# Function to run one load level: N concurrent sessions, each doing a number of journeys
+def run_load(sessions, journeys, trick_names, think_time, timeout):
+    """Return throughput, latency, memory and shared-resource timings for one session count"""
+    rerun_timings = Timings()
+    call_timings = Timings()
+    undo = instrument_shared_resources(call_timings)
+
+    memory_before = resident_memory_bytes()
+    errors = []
+    simulated = [SimulatedSession(i, trick_names, rerun_timings, think_time, timeout) for i in range(sessions)]
+
+    def run_session(session_id, session):
+        try:
+            for _ in range(journeys):
+                session.journey()
+        except Exception as error:  # noqa: BLE001 - report every failed session, keep the others going
+            errors.append(f"session {session_id}: {type(error).__name__}: {error}")
+
+    start = time.perf_counter()
+    try:
+        with shared_test_runtime(), ThreadPoolExecutor(max_workers=sessions) as executor:
+            list(executor.map(run_session, range(sessions), simulated))
+    finally:
+        undo()
+    elapsed = time.perf_counter() - start
+    # Measured while every session (and its session state) is still alive
+    memory_after = resident_memory_bytes()
+
+    # A failed session stops early and leaves the others less contention, so the numbers would flatter the app
+    if errors:
+        return {"sessions": sessions, "journeys_per_session": journeys, "failed": True, "errors": sorted(errors)}
+
+    actions = rerun_timings.summary()
+    all_reruns = sorted(d for durations in rerun_timings.durations.values() for d in durations)
+    return {
+        "sessions": sessions,
+        "journeys_per_session": journeys,
+        "reruns": len(all_reruns),
+        "failed": False,
+        "elapsed_s": round(elapsed, 3),
+        "reruns_per_s": round(len(all_reruns) / elapsed, 2) if elapsed else 0.0,
+        "rerun_p50_ms": round(percentile(all_reruns, 0.5) * 1000, 3),
+        "rerun_p99_ms": round(percentile(all_reruns, 0.99) * 1000, 3),
+        "rss_before_bytes": memory_before,
+        "rss_after_bytes": memory_after,
+        "rss_growth_per_session_bytes": (memory_after - memory_before) // sessions,
+        "actions": actions,
+        "shared_resources": call_timings.summary(),
+    }
+
+
+# Function to print one load level's results
+def print_result(result):
+    if result["failed"]:
+        print(f"\n{result['sessions']} sessions x {result['journeys_per_session']} journeys: FAILED, "
+              f"{len(result['errors'])} sessions raised")
+        for error in result["errors"]:
+            print(f"  {error}")
+        return
+
+    mb = 1024 * 1024
+    print(f"\n{result['sessions']} sessions x {result['journeys_per_session']} journeys: "
+          f"{result['reruns']} reruns in {result['elapsed_s']:.1f}s = {result['reruns_per_s']:.1f} reruns/s, "
+          f"p50 {result['rerun_p50_ms']:.1f}ms, p99 {result['rerun_p99_ms']:.1f}ms, "
+          f"RSS {result['rss_before_bytes'] / mb:.0f}->{result['rss_after_bytes'] / mb:.0f} MB "
+          f"({result['rss_growth_per_session_bytes'] / 1024:.0f} KB/session)")
+
+    print(f"  {'rerun':34} {'count':>6} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, stats in result["actions"].items():
+        print(f"  {name:34} {stats['count']:>6} {stats['p50_ms']:>9.2f} {stats['p99_ms']:>9.2f} {stats['max_ms']:>9.2f}")
+
+    # Share of all rerun time spent inside the shared resources (their own work plus waiting on locks)
+    rerun_total = sum(stats["total_s"] for stats in result["actions"].values())
+    print(f"  {'shared resource':34} {'count':>6} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} {'% rerun':>8}")
+    for name, stats in result["shared_resources"].items():
+        share = stats["total_s"] / rerun_total * 100 if rerun_total else 0.0
+        print(f"  {name:34} {stats['count']:>6} {stats['p50_ms']:>9.2f} {stats['p99_ms']:>9.2f} "
+              f"{stats['max_ms']:>9.2f} {share:>7.1f}%")
+
+
+# Function to identify the commit being load-tested
+def current_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 8, 32],
+                        help="concurrent session counts to run, one load level each")
+    parser.add_argument("--journeys", type=int, default=3, help="journeys each session runs per load level")
+    parser.add_argument("--tricks", type=int, default=1000, help="synthetic catalog size")
+    parser.add_argument("--completion", type=float, default=0.25, help="fraction of tricks marked as completed")
+    parser.add_argument("--think-time", type=float, default=0.0,
+                        help="mean pause between a user's actions, in seconds (0 = as fast as possible)")
+    parser.add_argument("--backend", choices=["sqlite", "json"], default="sqlite", help="progress store backend")
+    parser.add_argument("--no-write-behind", action="store_true", help="write every toggle to the store directly")
+    parser.add_argument("--timeout", type=float, default=600, help="AppTest timeout per run, in seconds")
+    parser.add_argument("--output", help="where to write the JSON results (default: benchmarks/results/load_<commit>.json)")
+    args = parser.parse_args()
+
+    # The app reads these when it opens the progress store
+    os.environ["TRICKY_PROGRESS_BACKEND"] = args.backend
+    os.environ["TRICKY_WRITE_BEHIND"] = "0" if args.no_write_behind else "1"
+
+    commit = current_commit()
+    catalog = make_catalog(args.tricks)
+    trick_names = [name for name, _ in catalog]
+    results = []
+    original_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        write_catalog(directory, catalog, args.completion)
+        os.chdir(directory)
+        try:
+            # Start from this catalog's data and a fresh progress store
+            reset_app_caches()
+            for sessions in args.sessions:
+                result = run_load(sessions, args.journeys, trick_names, args.think_time, args.timeout)
+                print_result(result)
+                results.append(result)
+                # Higher load levels would only fail the same way
+                if result["failed"]:
+                    break
+        finally:
+            reset_app_caches()
+            os.chdir(original_dir)
+
+    output = args.output or os.path.join(REPO_DIR, "benchmarks", "results", f"load_{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({"commit": commit, "python": sys.version.split()[0], "st_version": st.__version__,
+                   "tricks": args.tricks, "backend": args.backend, "write_behind": not args.no_write_behind,
+                   "results": results}, f, indent=4)
+    print(f"\nWrote {output}", file=sys.stderr)
+    return 1 if any(result["failed"] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
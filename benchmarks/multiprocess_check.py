@@ -0,0 +1,228 @@
+"""Check the state that several server processes share on one machine.
+
+Starts real processes against a scratch directory and checks that nothing
+is lost when they race:
+
+    progress  every process toggles its own tricks (and one shared trick)
+              in the same progress store; every toggle must survive
+    catalog   every process loads the catalog while its snapshot is stale;
+              all must get the same catalog and leave one valid snapshot
+    history   every process records toggles in the same progress history,
+              compacting it often; every event must be counted exactly once
+
+Exits non-zero if any check fails.
+
+    python benchmarks/multiprocess_check.py
+    python benchmarks/multiprocess_check.py --checks progress --backend json --processes 8 --tricks 100
+    python benchmarks/multiprocess_check.py --checks history --events 500 --compact-events 50
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+
+# Trick every process toggles, so they also race on the same entry
+SHARED_TRICK = "Shared Trick"
+
+
+# Worker: toggle this process's tricks in the shared progress store
+def toggle_tricks(backend, directory, worker, tricks, barrier):
+    from progress_store import DEFAULT_USER, create_progress_store
+
+    store = create_progress_store(backend, sqlite_path=os.path.join(directory, "progress.db"),
+                                  json_path=os.path.join(directory, "completed_tricks.json"))
+    barrier.wait()
+    for i in range(tricks):
+        store.set_completed(DEFAULT_USER, f"worker {worker} trick {i}", True)
+        # Learned then unlearned again, so it must not be there at the end
+        store.set_completed(DEFAULT_USER, f"worker {worker} undone {i}", True)
+        store.set_completed(DEFAULT_USER, f"worker {worker} undone {i}", False)
+        store.set_completed(DEFAULT_USER, SHARED_TRICK, i % 2 == 0)
+    # Everyone finishes with the shared trick learned
+    store.set_completed(DEFAULT_USER, SHARED_TRICK, True)
+    store.close()
+
+
+def check_progress(processes, tricks, backend, directory):
+    """Return a list of problems (empty if every toggle survived)"""
+    from progress_store import DEFAULT_USER, create_progress_store
+
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(processes)
+    workers = [
+        context.Process(target=toggle_tricks, args=(backend, directory, worker, tricks, barrier))
+        for worker in range(processes)
+    ]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+
+    problems = [f"worker exited with {process.exitcode}" for process in workers if process.exitcode != 0]
+
+    store = create_progress_store(backend, sqlite_path=os.path.join(directory, "progress.db"),
+                                  json_path=os.path.join(directory, "completed_tricks.json"))
+    completed = store.get_completed(DEFAULT_USER)
+    store.close()
+
+    expected = {f"worker {worker} trick {i}" for worker in range(processes) for i in range(tricks)}
+    expected.add(SHARED_TRICK)
+    missing = expected - set(completed)
+    unexpected = set(completed) - expected
+    if missing:
+        problems.append(f"{len(missing)} toggles lost, e.g. {sorted(missing)[0]!r}")
+    if unexpected:
+        problems.append(f"{len(unexpected)} tricks that were unlearned are still there, e.g. {sorted(unexpected)[0]!r}")
+    if len(completed) != len(set(completed)):
+        problems.append("some tricks are listed more than once")
+    print(f"progress ({backend}): {processes} processes x {tricks} tricks, "
+          f"{len(completed)}/{len(expected)} completed", file=sys.stderr)
+    return problems
+
+
+# Worker: load the catalog the way a starting server process does
+def load_catalog(directory, results):
+    os.chdir(directory)
+    import utils
+
+    df = utils.load_catalog()
+    results.put((len(df), list(df['Trick']), [list(types) for types in df['Types']]))
+
+
+def check_catalog(processes, directory):
+    """Return a list of problems (empty if every process got the same catalog from one valid snapshot)"""
+    shutil.copy(os.path.join(REPO_DIR, "skateboard_tricks.csv"), directory)
+    # A newer CSV makes any existing snapshot stale, so the processes race to rebuild it
+    os.utime(os.path.join(directory, "skateboard_tricks.csv"), (time.time(), time.time()))
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    workers = [context.Process(target=load_catalog, args=(directory, results)) for _ in range(processes)]
+    for process in workers:
+        process.start()
+    # Read the results before joining, so no worker blocks on a full queue
+    catalogs = []
+    for _ in workers:
+        try:
+            catalogs.append(results.get(timeout=300))
+        except queue.Empty:
+            break
+    for process in workers:
+        process.join()
+
+    problems = [f"worker exited with {process.exitcode}" for process in workers if process.exitcode != 0]
+    if any(catalog != catalogs[0] for catalog in catalogs):
+        problems.append("processes loaded different catalogs")
+
+    from catalog_snapshot import read_catalog_table
+    table = read_catalog_table(os.path.join(directory, "skateboard_tricks.csv"),
+                               os.path.join(directory, ".skateboard_tricks.arrow"))
+    if table is None:
+        problems.append("no valid snapshot was left behind")
+    elif catalogs and table.num_rows != catalogs[0][0]:
+        problems.append("the snapshot doesn't match the loaded catalog")
+    leftovers = [name for name in os.listdir(directory) if name.endswith(".tmp")]
+    if leftovers:
+        problems.append(f"temp files left behind: {', '.join(leftovers)}")
+    print(f"catalog: {processes} processes loaded {catalogs[0][0] if catalogs else 0} tricks", file=sys.stderr)
+    return problems
+
+
+# Worker: record toggles for two users in the shared progress history, flushing in many small batches
+def record_events(directory, worker, events, compact_events, barrier):
+    from progress_history import ProgressHistory
+
+    history = ProgressHistory(directory, compact_events=compact_events, flush_interval=0.001)
+    barrier.wait()
+    for i in range(events):
+        history.record(f"user {worker % 2}", f"worker {worker} trick {i}", i % 3 != 0)
+        if i % 10 == 0:
+            # Let the writer flush (and sometimes compact) while the others are doing the same
+            time.sleep(0.002)
+        if i % 25 == 0:
+            # Reads catch up on the other processes' appends and compactions as they go
+            history.history(f"user {worker % 2}")
+    history.close()
+
+
+def check_history(processes, events, compact_events, directory):
+    """Return a list of problems (empty if a fresh reader counts every event exactly once)"""
+    from progress_history import ProgressHistory
+
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(processes)
+    workers = [
+        context.Process(target=record_events, args=(directory, worker, events, compact_events, barrier))
+        for worker in range(processes)
+    ]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+
+    problems = [f"worker exited with {process.exitcode}" for process in workers if process.exitcode != 0]
+
+    history = ProgressHistory(directory, compact_events=compact_events)
+    learned_per_worker = sum(i % 3 != 0 for i in range(events))
+    for user in range(2):
+        workers_for_user = len(range(user, processes, 2))
+        expected = (learned_per_worker * workers_for_user, (events - learned_per_worker) * workers_for_user)
+        for period in ("day", "week"):
+            # Every event happened just now, so it falls in today's (and this week's) bucket
+            counted = tuple(sum(counts[i] for _, *counts in history.history(f"user {user}", period)) for i in (0, 1))
+            if counted != expected:
+                problems.append(f"user {user} by {period}: counted (learned, unlearned) {counted}, expected {expected}")
+    history.close()
+
+    logs = [name for name in os.listdir(directory) if name.startswith("events.")]
+    if len(logs) != 1:
+        problems.append(f"expected one current log, found {', '.join(sorted(logs)) or 'none'}")
+    print(f"history: {processes} processes x {events} events, compacting every {compact_events}, "
+          f"generation {history.generation}", file=sys.stderr)
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--checks", nargs="+", choices=["progress", "catalog", "history"],
+                        default=["progress", "catalog", "history"], help="which checks to run")
+    parser.add_argument("--processes", type=int, default=4, help="concurrent processes")
+    parser.add_argument("--tricks", type=int, default=50, help="tricks each process toggles")
+    parser.add_argument("--backend", nargs="+", choices=["sqlite", "json"], default=["sqlite", "json"],
+                        help="progress store backends to check")
+    parser.add_argument("--events", type=int, default=150, help="toggles each process records in the history")
+    parser.add_argument("--compact-events", type=int, default=100, help="compact the history every this many events")
+    args = parser.parse_args()
+
+    problems = []
+    for check in args.checks:
+        if check == "progress":
+            for backend in args.backend:
+                with tempfile.TemporaryDirectory() as directory:
+                    problems += [f"progress ({backend}): {problem}"
+                                 for problem in check_progress(args.processes, args.tricks, backend, directory)]
+        elif check == "catalog":
+            with tempfile.TemporaryDirectory() as directory:
+                problems += [f"catalog: {problem}" for problem in check_catalog(args.processes, directory)]
+        elif check == "history":
+            with tempfile.TemporaryDirectory() as directory:
+                problems += [f"history: {problem}" for problem in
+                             check_history(args.processes, args.events, args.compact_events, directory)]
+
+    for problem in problems:
+        print(f"FAILED {problem}")
+    if not problems:
+        print("all checks passed")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
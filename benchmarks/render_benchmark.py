@@ -0,0 +1,235 @@
+"""Benchmark how expensive a rerun of each page is.
+
+Drives Home.py, pages/Trick_Page.py and pages/Your_Progress.py through
+streamlit.testing.v1.AppTest against synthetic catalogs, and writes the
+results as JSON so runs from different commits can be compared.
+
+    python benchmarks/render_benchmark.py --sizes 100 1000 --completion 0 0.5
+    python benchmarks/render_benchmark.py --compare old.json new.json
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import streamlit as st  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+
+# Building blocks for realistic synthetic trick names (stance x rotation x base trick)
+STANCES = ["", "Fakie", "Switch", "Nollie"]
+ROTATIONS = ["", "BS 180", "FS 180", "BS 360", "FS 360", "Varial", "Hardflip"]
+BASE_TRICKS = [
+    "Ollie", "Kickflip", "Heelflip", "Pop Shove-It", "Impossible", "Tre Flip", "Laser Flip",
+    "Boardslide", "50-50 Grind", "5-0 Grind", "Nosegrind", "Crooked Grind", "Smith Grind",
+    "Feeble Grind", "Lipslide", "Tailslide", "Noseslide", "Manual", "Nose Manual", "Casper",
+]
+
+
+# Function to generate a synthetic catalog of the given size
+def make_catalog(size, seed=0):
+    """Return a list of (name, difficulty) pairs with unique names"""
+    rng = random.Random(seed)
+    combos = [" ".join(part for part in (stance, rotation, base) if part)
+              for stance in STANCES for rotation in ROTATIONS for base in BASE_TRICKS]
+    names = []
+    for i in range(size):
+        name = combos[i % len(combos)]
+        if i >= len(combos):
+            name = f"{name} {i // len(combos) + 1}"
+        names.append(name)
+    return sorted(((name, rng.randint(1, 100)) for name in names), key=lambda trick: trick[1])
+
+
+# Function to write a catalog (and its progress) into a scratch app directory
+def write_catalog(directory, catalog, completion, seed=0):
+    """Write the CSV, a one-trick video JSON and completed_tricks.json for a synthetic run"""
+    rng = random.Random(seed)
+    with open(os.path.join(directory, 'skateboard_tricks.csv'), 'w') as f:
+        f.write("Trick,Difficulty\n")
+        for name, difficulty in catalog:
+            f.write(f"{name},{difficulty}\n")
+
+    # Give the benchmarked trick real videos so the video blocks are exercised
+    first_name = catalog[len(catalog) // 2][0]
+    clip = {"url": "https://www.youtube.com/watch?v=Jig3uiYsb4w", "start_time": 17, "end_time": 26}
+    video_data = {first_name: {"slow_motion": clip, "pro_examples": [dict(clip, name="Pro")] * 2, "tutorial": ""}}
+    with open(os.path.join(directory, 'trick_videos.json'), 'w') as f:
+        json.dump(video_data, f)
+
+    completed = [name for name, _ in catalog if rng.random() < completion]
+    with open(os.path.join(directory, 'completed_tricks.json'), 'w') as f:
+        json.dump({"completed": completed}, f)
+
+
+# Function to count the elements a run produced
+def count_elements(node):
+    """Count leaf elements below an AppTest tree node"""
+    children = getattr(node, "children", None)
+    if not children:
+        return 1
+    return sum(count_elements(child) for child in children.values())
+
+
+# Page scenarios: (name, script, query params to start with, action applied before each measured rerun)
+def make_scenarios(catalog):
+    trick_name, _ = catalog[len(catalog) // 2]
+    trick_query = {"trick": trick_name}
+    return [
+        ("home", "Home.py", {}, None),
+        ("home_search", "Home.py", {}, lambda at, i: at.text_input(key="trick_search").input("flip"[:i % 4 + 1])),
+        ("home_type_filter", "Home.py", {}, lambda at, i: at.radio[0].set_value(["Flip Tricks", "Other"][i % 2])),
+        ("trick_page", "pages/Trick_Page.py", trick_query, None),
+        ("trick_page_toggle", "pages/Trick_Page.py", trick_query, lambda at, i: at.checkbox[0].set_value(i % 2 == 0)),
+        ("your_progress", "pages/Your_Progress.py", {}, None),
+    ]
+
+
+# Function to time one scenario
+def run_scenario(script, query, action, reruns, timeout):
+    """Return cold/warm rerun timings, element count and peak traced memory for one scenario"""
+    at = AppTest.from_file(os.path.join(REPO_DIR, script), default_timeout=timeout)
+    for key, value in query.items():
+        at.query_params[key] = value
+
+    start = time.perf_counter()
+    at.run()
+    cold_time = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(f"{script} raised: {at.exception[0].value}")
+
+    rerun_times = []
+    for i in range(reruns):
+        if action is not None:
+            action(at, i)
+        start = time.perf_counter()
+        at.run()
+        rerun_times.append(time.perf_counter() - start)
+
+    element_count = count_elements(at._tree)
+
+    # Memory is traced in a separate rerun, since tracemalloc slows everything down
+    tracemalloc.start()
+    if action is not None:
+        action(at, reruns)
+    at.run()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "cold_s": round(cold_time, 5),
+        "rerun_p50_s": round(statistics.median(rerun_times), 5),
+        "rerun_max_s": round(max(rerun_times), 5),
+        "rerun_mean_s": round(statistics.fmean(rerun_times), 5),
+        "elements": element_count,
+        "peak_memory_bytes": peak_memory,
+    }
+
+
+# Function to drop the app's process-wide caches between catalogs
+def reset_app_caches():
+    """Close the progress store and history (flushing queued toggles) before clearing the caches that hold them"""
+    import utils
+
+    # Otherwise their writer threads outlive the cache and write into whatever directory comes next
+    utils.get_progress_store().close()
+    utils.get_progress_history().close()
+    st.cache_resource.clear()
+    st.cache_data.clear()
+
+
+# Function to identify the commit being benchmarked
+def current_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_benchmarks(sizes, completions, reruns, timeout):
+    results = []
+    original_dir = os.getcwd()
+    for size in sizes:
+        catalog = make_catalog(size)
+        for completion in completions:
+            with tempfile.TemporaryDirectory() as directory:
+                write_catalog(directory, catalog, completion)
+                os.chdir(directory)
+                try:
+                    # Drop the previous catalog's data and progress store
+                    reset_app_caches()
+                    for name, script, query, action in make_scenarios(catalog):
+                        result = run_scenario(script, query, action, reruns, timeout)
+                        result.update(scenario=name, tricks=size, completion=completion)
+                        results.append(result)
+                        print(f"{name:18} tricks={size:<6} completion={completion:<4} "
+                              f"cold={result['cold_s']:.3f}s p50={result['rerun_p50_s']:.3f}s "
+                              f"elements={result['elements']}", file=sys.stderr)
+                finally:
+                    reset_app_caches()
+                    os.chdir(original_dir)
+    return results
+
+
+# Function to compare two result files
+def compare(old_path, new_path):
+    """Print the rerun p50 and element count change for every scenario in both files"""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    def key(result):
+        return result["scenario"], result["tricks"], result["completion"]
+
+    old_results = {key(result): result for result in old["results"]}
+    print(f"{'scenario':18} {'tricks':>6} {'done':>5} {'p50 old':>9} {'p50 new':>9} {'change':>8} {'elements':>15}")
+    for result in new["results"]:
+        before = old_results.get(key(result))
+        if before is None:
+            continue
+        change = (result["rerun_p50_s"] / before["rerun_p50_s"] - 1) * 100 if before["rerun_p50_s"] else 0.0
+        print(f"{result['scenario']:18} {result['tricks']:>6} {result['completion']:>5} "
+              f"{before['rerun_p50_s']:>9.4f} {result['rerun_p50_s']:>9.4f} {change:>+7.1f}% "
+              f"{before['elements']:>7}->{result['elements']:<7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000], help="catalog sizes")
+    parser.add_argument("--completion", type=float, nargs="+", default=[0.0, 0.25, 0.75],
+                        help="fraction of tricks marked as completed")
+    parser.add_argument("--reruns", type=int, default=5, help="measured reruns per scenario")
+    parser.add_argument("--timeout", type=float, default=600, help="AppTest timeout per run, in seconds")
+    parser.add_argument("--output", help="where to write the JSON results (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    commit = current_commit()
+    results = run_benchmarks(args.sizes, args.completion, args.reruns, args.timeout)
+
+    output = args.output or os.path.join(REPO_DIR, "benchmarks", "results", f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({"commit": commit, "python": sys.version.split()[0], "st_version": st.__version__,
+                   "results": results}, f, indent=4)
+    print(f"Wrote {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
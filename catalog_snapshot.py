@@ -0,0 +1,50 @@
+import json
+import os
+import tempfile
+
+import pyarrow as pa
+import pyarrow.feather as feather
+
+
+# Bump when the snapshot's columns change so stale snapshots are rebuilt
+SNAPSHOT_VERSION = 1
+
+# Schema metadata key holding the source CSV signature the snapshot was built from
+SOURCE_KEY = b"tricky.source"
+
+
+# Function to identify the exact source file a snapshot was built from
+def source_signature(source_path):
+    stat = os.stat(source_path)
+    return json.dumps([SNAPSHOT_VERSION, os.path.abspath(source_path), stat.st_mtime_ns, stat.st_size])
+
+
+# Function to save the prepared catalog as an Arrow (Feather v2) file
+def write_catalog_snapshot(df, source_path, snapshot_path):
+    """Write df with the source CSV's signature in the schema metadata"""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), SOURCE_KEY: source_signature(source_path)})
+
+    # Write to a temp file and swap it in so other workers never map a half-written snapshot;
+    # uncompressed, so reading it is a memory map rather than a decode
+    directory = os.path.dirname(os.path.abspath(snapshot_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+    try:
+        feather.write_feather(table, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, snapshot_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+# Function to load the prepared catalog, if the snapshot matches the current CSV
+def read_catalog_table(source_path, snapshot_path):
+    """Memory-map the snapshot as an Arrow table, or return None if it's missing or stale"""
+    try:
+        table = feather.read_table(snapshot_path, memory_map=True)
+    except (OSError, pa.ArrowInvalid):
+        return None
+    if (table.schema.metadata or {}).get(SOURCE_KEY) != source_signature(source_path).encode():
+        return None
+    return table
@@ -0,0 +1,27 @@
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, so fall back to single-process behavior
+    fcntl = None
+
+
+# Cross-process exclusive lock on a lock file next to the resource it guards
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive advisory lock on path (created if missing) for the duration of the block"""
+    if fcntl is None:
+        yield
+        return
+
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        # Closing the descriptor releases the lock too, even if unlocking fails
+        try:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
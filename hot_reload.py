@@ -0,0 +1,78 @@
+import itertools
+import logging
+import os
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+# Snapshot versions are unique across every reloader in the process, so they can key caches
+snapshot_versions = itertools.count(1)
+
+
+# Holds the latest data snapshot and rebuilds it in the background when its source files change
+class SnapshotReloader:
+    """Rebuild a snapshot when any of its source files change, swapping it in once it's ready"""
+
+    def __init__(self, build, paths, check_interval=1.0):
+        self.build = build
+        self.paths = list(paths)
+        self.check_interval = check_interval
+
+        self._lock = threading.Lock()
+        self._rebuilding = False
+        self._last_check = time.monotonic()
+
+        # The first snapshot is built synchronously, since there's nothing older to serve
+        self._signature = self.file_signature()
+        self.version = next(snapshot_versions)
+        self.snapshot = build(self.version)
+
+    def file_signature(self):
+        """Get (mtime, size) for each source file, or None for files that don't exist"""
+        signature = []
+        for path in self.paths:
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def get(self):
+        """Get the current snapshot, starting a background rebuild if the source files changed"""
+        # Only stat the files every check_interval seconds, not on every call
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval:
+            self._last_check = now
+            self.check()
+        return self.snapshot
+
+    def check(self):
+        """Start a background rebuild if the source files changed; returns whether one was started"""
+        signature = self.file_signature()
+        with self._lock:
+            if signature == self._signature or self._rebuilding:
+                return False
+            self._rebuilding = True
+
+        threading.Thread(target=self._rebuild, args=(signature,), name="snapshot-reloader", daemon=True).start()
+        return True
+
+    def _rebuild(self, signature):
+        version = next(snapshot_versions)
+        try:
+            snapshot = self.build(version)
+        except Exception:
+            # e.g. a half-saved JSON file; keep serving the old data until the file changes again
+            logger.exception("Failed to reload %s, keeping the previous data", ", ".join(self.paths))
+        else:
+            # Readers either see the old snapshot or the new one, never a partly built one
+            self.version = version
+            self.snapshot = snapshot
+            logger.info("Reloaded %s (version %d)", ", ".join(self.paths), self.version)
+        finally:
+            with self._lock:
+                self._signature = signature
+                self._rebuilding = False
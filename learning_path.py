@@ -0,0 +1,125 @@
+import functools
+import logging
+import os
+
+import pandas as pd
+
+
+logger = logging.getLogger(__name__)
+
+# How many completed sets (and answers per goal and completed set) each graph remembers
+QUERY_CACHE_SIZE = 256
+
+
+# Function to list the set bits of a bitset
+def bit_positions(bits):
+    """Positions of the bits set in bits, lowest first"""
+    binary = bin(bits)[:1:-1]
+    positions = []
+    position = binary.find("1")
+    while position != -1:
+        positions.append(position)
+        position = binary.find("1", position + 1)
+    return positions
+
+
+# Prerequisite graph between tricks (e.g. Ollie -> Kickflip -> Varial Kickflip), built once per catalog
+class PrerequisiteGraph:
+    """DAG of trick prerequisites with precomputed topological order and reachability bitsets"""
+
+    def __init__(self, edges, difficulties):
+        self.difficulties = difficulties
+
+        # trick -> the tricks you should be able to do first
+        prerequisites = {}
+        for trick_name, prerequisite in edges:
+            if trick_name not in difficulties or prerequisite not in difficulties:
+                logger.warning("Skipping prerequisite %s -> %s: trick not in the catalog", prerequisite, trick_name)
+                continue
+            prerequisites.setdefault(trick_name, set()).add(prerequisite)
+        self.prerequisites = {trick_name: tuple(sorted(prereqs)) for trick_name, prereqs in prerequisites.items()}
+
+        self.order = self.topological_order()
+
+        # Bitsets over topological positions, so unions are single integer ORs and
+        # listing a set's bits yields its tricks already in an order they can be learned
+        self.names = sorted(self.order, key=self.order.get)
+        self.prerequisite_positions = [
+            tuple(self.order[prerequisite] for prerequisite in self.prerequisites.get(trick_name, ()))
+            for trick_name in self.names
+        ]
+        self.ancestor_bits = []
+        for prerequisite_positions in self.prerequisite_positions:
+            ancestors = 0
+            for position in prerequisite_positions:
+                ancestors |= 1 << position | self.ancestor_bits[position]
+            self.ancestor_bits.append(ancestors)
+
+        # The progress page asks again on every render, so answers are memoized per completed set
+        self.known_bits = functools.lru_cache(maxsize=QUERY_CACHE_SIZE)(self._known_bits)
+        self._learning_plan = functools.lru_cache(maxsize=QUERY_CACHE_SIZE)(self._learning_plan)
+
+    def topological_order(self):
+        """Map each trick to its position in a topological order (easier tricks first among equals)"""
+        dependents = {}
+        remaining = {trick_name: 0 for trick_name in self.difficulties}
+        for trick_name, prereqs in self.prerequisites.items():
+            remaining[trick_name] = len(prereqs)
+            for prerequisite in prereqs:
+                dependents.setdefault(prerequisite, []).append(trick_name)
+
+        # Kahn's algorithm; a sorted ready list keeps the order deterministic
+        ready = sorted((trick_name for trick_name, count in remaining.items() if count == 0),
+                       key=lambda name: (self.difficulties[name], name), reverse=True)
+        order = {}
+        while ready:
+            trick_name = ready.pop()
+            order[trick_name] = len(order)
+            newly_ready = []
+            for dependent in dependents.get(trick_name, ()):
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    newly_ready.append(dependent)
+            if newly_ready:
+                ready.extend(newly_ready)
+                ready.sort(key=lambda name: (self.difficulties[name], name), reverse=True)
+
+        if len(order) != len(self.difficulties):
+            cycle = sorted(trick_name for trick_name in self.difficulties if trick_name not in order)
+            raise ValueError(f"Trick prerequisites contain a cycle involving: {', '.join(cycle)}")
+        return order
+
+    def has_prerequisites(self, trick_name):
+        """Check whether a trick has any prerequisites"""
+        position = self.order.get(trick_name)
+        return position is not None and self.ancestor_bits[position] != 0
+
+    def _known_bits(self, completed):
+        """Bitset of the learned tricks plus everything a learned trick builds on (completed is a frozenset)"""
+        known = 0
+        for trick_name in completed:
+            position = self.order.get(trick_name)
+            if position is not None:
+                known |= 1 << position | self.ancestor_bits[position]
+        return known
+
+    def learning_plan(self, target, completed):
+        """Every not-yet-learned trick needed for target (target included), in an order they can be learned"""
+        return list(self._learning_plan(target, frozenset(completed)))
+
+    def _learning_plan(self, target, completed):
+        if target in completed or target not in self.order:
+            return ()
+
+        position = self.order[target]
+        needed = self.ancestor_bits[position] & ~self.known_bits(completed)
+        return tuple(self.names[needed_position] for needed_position in bit_positions(needed)) + (target,)
+
+
+# Function to load the prerequisite graph that sits next to skateboard_tricks.csv
+def load_prerequisite_graph(path, difficulties):
+    """Load (trick, prerequisite) pairs from CSV; a missing file gives a graph with no edges"""
+    if not os.path.exists(path):
+        return PrerequisiteGraph([], difficulties)
+    df = pd.read_csv(path)
+    return PrerequisiteGraph(zip(df['Trick'], df['Prerequisite']), difficulties)
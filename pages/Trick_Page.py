@@ -7,93 +7,122 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import from the main file
 from utils import (
-    display_video_with_replay,
-    get_tricks_df, get_video_data, get_completed_tricks, save_completed_tricks
+    display_video_with_replay, display_trick_links, initialize_session_state, profile_section,
+    remember_session_key, home_query_params, switch_to_home, markdown_code,
+    get_trick_index, get_video_data, get_video_metadata, get_completed_tricks, set_trick_completed
 )
 
-df_tricks = get_tricks_df()
-video_data = get_video_data()
-completed_tricks = get_completed_tricks()
-
 # Set page config
 st.set_page_config(page_title="Trick Page", layout="wide", initial_sidebar_state="collapsed")
 
-# Callback function for navigation to similar tricks
-def navigate_to_similar_trick(trick_name, difficulty):
-    st.session_state.selected_trick = trick_name
-    st.session_state.selected_difficulty = difficulty
-    st.session_state.redirect_to_page = "pages/Trick_Page.py"
+# Initialize all required session state
+initialize_session_state()
+
+trick_index = get_trick_index()
+video_data = get_video_data()
+video_metadata = get_video_metadata()
+completed_tricks = get_completed_tricks()
 
-# Check if we have the required session state
-if 'selected_trick' not in st.session_state or st.session_state.selected_trick is None:
-    st.error("No trick selected. Please go back to the home page and select a trick.")
+# Show a video's cached title and channel, or a warning if YouTube no longer serves it
+def display_video_caption(video_id):
+    metadata = video_metadata.get(video_id)
+    if metadata is None:
+        return
+    if metadata["available"]:
+        st.caption(f"{metadata['title']} · {metadata['author_name']}")
+    else:
+        st.warning("This video may no longer be available on YouTube.")
+
+# One video with its replay button and caption; a replay only reruns this fragment
+@st.fragment
+def display_clip(clip, video_key, height):
+    display_video_with_replay(
+        clip.url,
+        start_time=clip.start_time,
+        end_time=clip.end_time,
+        video_id=clip.video_id,
+        button_text="↻ Replay",
+        video_key=video_key,
+        height=height
+    )
+    display_video_caption(clip.video_id)
+
+# The "Mark as Learned" checkbox; ticking it only reruns this fragment
+@st.fragment
+def display_mark_as_learned(trick_name):
+    # Initialize the checkbox state in session state if not already present
+    # (only the most recently visited tricks keep theirs)
+    checkbox_key = f"completed_{trick_name}"
+    remember_session_key("checkboxes", checkbox_key)
+    if checkbox_key not in st.session_state:
+        st.session_state[checkbox_key] = trick_name in get_completed_tricks()['completed']
+
+    # Create a callback function to handle checkbox changes
+    def on_checkbox_change():
+        # Save just this trick's new state for the current user
+        set_trick_completed(trick_name, st.session_state[checkbox_key])
+
+    # Display the checkbox with the callback
+    st.checkbox(
+        "I can do this trick!",
+        key=checkbox_key,
+        on_change=on_checkbox_change
+    )
+
+# The trick comes from the URL (?trick=Kickflip), so trick pages can be bookmarked and shared
+trick_name = st.query_params.get("trick")
+
+# Check that the URL names a trick in the catalog (an O(1) lookup in the trick index)
+if trick_name is None or trick_name not in trick_index.positions:
+    if trick_name is None:
+        st.error("No trick selected. Please go back to the home page and select a trick.")
+    else:
+        # The name comes straight from the URL, so it's shown as code rather than as markdown
+        st.error(f"Couldn't find a trick called {markdown_code(trick_name)}. "
+                 "Please go back to the home page and select a trick.")
     if st.button("Go to Home Page"):
-        st.switch_page("Home.py")
+        switch_to_home()
 else:
 
-    trick_name = st.session_state.selected_trick
-    difficulty = st.session_state.selected_difficulty
+    difficulty = trick_index.get_trick(trick_name)[1]
 
     # Add back button
     if st.button(":material/arrow_back: All Tricks 🛹"):
-        st.switch_page("Home.py")
+        switch_to_home()
 
     # Center the trick name and difficulty
     st.markdown(f"<h1 style='text-align: center;'>{trick_name}</h1>", unsafe_allow_html=True)
     st.markdown(f"<h3 style='text-align: center;'>Difficulty: {difficulty}/100</h3>", unsafe_allow_html=True)
 
     # Get the videos for this trick
-    trick_videos = video_data.get(trick_name, {
-        "slow_motion": {"url": "", "start_time": None, "end_time": None},
-        "pro_examples": [],
-        "tutorial": ""
-    })
+    trick_videos = video_data.get(trick_name)
 
     # Display slow motion video if available
     st.subheader("Slow Motion Demonstration")
-    if trick_videos["slow_motion"]["url"]:
-        # Create a unique key for the slow motion video
-        slow_mo_key = f"slow_mo_{trick_name}"
-
-        # Display video with replay button
-        display_video_with_replay(
-            trick_videos["slow_motion"]["url"],
-            start_time=trick_videos["slow_motion"]["start_time"],
-            end_time=trick_videos["slow_motion"]["end_time"],
-            button_text="↻ Replay",
-            video_key=slow_mo_key,
-            height=450
-        )
+    if trick_videos.slow_motion:
+        # Display video with replay button, under a unique key for the slow motion video
+        display_clip(trick_videos.slow_motion, f"slow_mo_{trick_name}", 450)
     else:
         st.info(f"No slow motion video available for {trick_name} yet. Check back later!")
 
     # Display pro examples if available
     st.subheader("Pro Skater Examples")
-    if trick_videos["pro_examples"]:
-        pro_cols = st.columns(min(3, len(trick_videos["pro_examples"])))
-        for i, example in enumerate(trick_videos["pro_examples"]):
+    if trick_videos.pro_examples:
+        pro_cols = st.columns(min(3, len(trick_videos.pro_examples)))
+        for i, example in enumerate(trick_videos.pro_examples):
             with pro_cols[i % 3]:
-                st.markdown(f"**{example['name']}**")
-
-                # Create a unique key for this pro example
-                pro_key = f"pro_{trick_name}_{i}"
-
-                # Display video with replay button
-                display_video_with_replay(
-                    example["url"],
-                    start_time=example["start_time"],
-                    end_time=example["end_time"],
-                    button_text="↻ Replay",
-                    video_key=pro_key,
-                    height=350
-                )
+                st.markdown(f"**{example.name}**")
+
+                # Display video with replay button, under a unique key for this pro example
+                display_clip(example, f"pro_{trick_name}_{i}", 350)
     else:
         st.info(f"No pro examples available for {trick_name} yet. Check back later!")
 
     # Display a tutorial video if available
     st.subheader("Tutorial Video")
-    if trick_videos["tutorial"]:
-        st.video(trick_videos["tutorial"])
+    if trick_videos.tutorial:
+        st.video(trick_videos.tutorial.url)
+        display_video_caption(trick_videos.tutorial.video_id)
     else:
         st.info(f"No tutorial video available for {trick_name} yet. Check back later!")
 
@@ -108,73 +137,22 @@ else:
         # Center the checkbox using columns
         _, checkbox_col, _ = st.columns([3, 2, 3])
         with checkbox_col:
-            # Initialize the checkbox state in session state if not already present
-            checkbox_key = f"completed_{trick_name}"
-            if checkbox_key not in st.session_state:
-                st.session_state[checkbox_key] = trick_name in completed_tricks['completed']
-
-            # Create a callback function to handle checkbox changes
-            def on_checkbox_change():
-                # Update the completed_tricks list based on the new checkbox state
-                if st.session_state[checkbox_key]:
-                    if trick_name not in completed_tricks['completed']:
-                        completed_tricks['completed'].append(trick_name)
-                else:
-                    if trick_name in completed_tricks['completed']:
-                        completed_tricks['completed'].remove(trick_name)
-
-                # Save updated completed tricks
-                save_completed_tricks(completed_tricks)
-
-            # Display the checkbox with the callback
-            st.checkbox(
-                "I can do this trick!",
-                key=checkbox_key,
-                on_change=on_checkbox_change
-            )
+            display_mark_as_learned(trick_name)
 
     st.markdown("---")
 
     # Display similar tricks
     st.subheader("Similar Tricks You Might Like")
-    # Find tricks with similar difficulty (within ±10)
-    similar_tricks_df = df_tricks[
-        (df_tricks["Difficulty"] >= difficulty - 10) &
-        (df_tricks["Difficulty"] <= difficulty + 10) &
-        (df_tricks["Trick"] != trick_name)
-        ]
+    with profile_section("trick_page.similar_tricks"):
+        # Find up to 5 tricks with similar difficulty (within ±10) from the precomputed index
+        completed_bits = trick_index.completed_bits(completed_tricks['completed'])
+        similar_tricks = trick_index.similar_tricks(trick_name, completed_bits)
 
     # Check if we have any similar tricks
-    if len(similar_tricks_df) > 0:
-        # Get a sample of up to 5 similar tricks
-        sample_size = min(5, len(similar_tricks_df))
-
-        # Use a consistent seed for sampling to prevent random changes on button clicks
-        similar_tricks = similar_tricks_df.sample(sample_size, random_state=42)
-
-        similar_cols = st.columns(sample_size)
-        for i, (_, similar_trick) in enumerate(similar_tricks.iterrows()):
-            with similar_cols[i]:
-                # Check if this similar trick is completed
-                is_completed = similar_trick['Trick'] in completed_tricks['completed']
-
-                # Create button for the similar trick with checkmark if completed
-                button_text = f"{similar_trick['Trick']}"
-                if is_completed:
-                    button_text = f"{similar_trick['Trick']} ✅"
-
-                if st.button(
-                        button_text,
-                        key=f"similar_{similar_trick['Trick']}_{i}",
-                        use_container_width=True,
-                        on_click=navigate_to_similar_trick,
-                        args=(similar_trick['Trick'], similar_trick['Difficulty'])
-                ):
-                    pass  # The callback handles the navigation
+    if similar_tricks:
+        # Links to the similar tricks' pages, one per column
+        # (they keep the Home page state from this page's URL, so "All Tricks" still goes back to it)
+        display_trick_links(similar_tricks, trick_index, completed_bits, columns=len(similar_tricks),
+                            home_params=home_query_params())
     else:
         st.info("No similar tricks found with comparable difficulty levels.")
-
-if 'redirect_to_page' in st.session_state and st.session_state.redirect_to_page:
-    page = st.session_state.redirect_to_page
-    st.session_state.redirect_to_page = None
-    st.switch_page(page)
\ No newline at end of file
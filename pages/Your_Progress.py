@@ -1,6 +1,4 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
 import sys
 import os
 
@@ -9,28 +7,32 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import from the main file
 from utils import (
-    get_tricks_df, get_completed_tricks
+    initialize_session_state, profile_section, get_global_data, get_completed_tricks,
+    get_trick_index, get_prerequisite_graph, get_progress_timeline, switch_to_home
 )
-
-df_tricks = get_tricks_df()
-completed_tricks = get_completed_tricks()
+from progress_analytics import get_progress_analytics, get_category_chart, get_completion_chart, get_timeline_chart
 
 # Set page config
 st.set_page_config(page_title="Your Progress", layout="wide", initial_sidebar_state="collapsed")
 
+# Initialize all required session state
+initialize_session_state()
+
+completed_tricks = get_completed_tricks()
+
 if st.button(":material/arrow_back: All Tricks 🛹"):
-    st.switch_page("Home.py")
+    switch_to_home()
 
 st.markdown("<h1 style='text-align: center;'>Your Skateboarding Progress</h1>", unsafe_allow_html=True)
 
-# Get data for analysis
-df = df_tricks.copy()  # Use a copy of the global df_tricks
-completed_list = completed_tricks['completed']
+# Get data for analysis (cached until the catalog or the completed tricks change)
+with profile_section("progress.analytics"):
+    analytics = get_progress_analytics(get_global_data(), completed_tricks['completed'])
 
 # Create tricks learned count with progress bar
 st.subheader("")
-total_tricks = len(df)
-completed_count = len(completed_list)
+total_tricks = analytics.total_tricks
+completed_count = analytics.completed_count
 completion_percentage = completed_count / total_tricks if total_tricks > 0 else 0
 
 # Create columns to shift the progress bar area to the left
@@ -47,25 +49,11 @@ st.markdown("---")
 st.subheader("Tricks by Difficulty Category")
 
 # Count tricks in each category
-category_order = ["Beginner", "Easy", "Intermediate", "Advanced", "Expert"]
-category_counts = df['Category'].value_counts().reindex(category_order).fillna(0)
+category_counts = analytics.category_counts
 
 # Create a bar chart using Plotly for better visualization
-fig = px.bar(
-    x=category_counts.index,
-    y=category_counts.values,
-    labels={'x': 'Difficulty Category', 'y': 'Number of Tricks'},
-    title='Distribution of Tricks by Difficulty',
-    color=category_counts.index,
-    color_discrete_map={
-    "Beginner": "#C5E1A5",
-    "Easy": "#66BB6A",
-    "Intermediate": "#26A69A",
-    "Advanced": "#5C6BC0",
-    "Expert": "#283593"
-    }
-)
-fig.update_layout(coloraxis_showscale=False)
+with profile_section("progress.category_chart"):
+    fig = get_category_chart(category_counts)
 st.plotly_chart(fig, use_container_width=True)
 
 # Add separator
@@ -74,74 +62,43 @@ st.markdown("---")
 # Display completion status by category
 st.subheader("Your Progress by Category")
 
-# Add a completion status column to the DataFrame
-df['Completed'] = df['Trick'].apply(lambda x: x in completed_list)
-
-# Group by category and count completed vs total
-category_progress = df.groupby('Category').agg(
-    Completed=('Completed', 'sum'),
-    Total=('Trick', 'count')
-).reset_index()
-
-# Add a percentage column
-category_progress['Percentage'] = (category_progress['Completed'] / category_progress['Total'] * 100).round(1)
-
-# Sort by the established category order
-category_order_dict = {cat: i for i, cat in enumerate(category_order)}
-category_progress['Order'] = category_progress['Category'].map(category_order_dict)
-category_progress = category_progress.sort_values('Order').drop('Order', axis=1)
-
-# Create a completion visualization
-completion_data = []
-for cat in category_order:
-    cat_data = category_progress[category_progress['Category'] == cat]
-    if not cat_data.empty:
-        completed = cat_data['Completed'].iloc[0]
-        total = cat_data['Total'].iloc[0]
-        completion_data.append({"Category": cat, "Status": "Completed", "Count": completed})
-        completion_data.append({"Category": cat, "Status": "Remaining", "Count": total - completed})
-
-completion_df = pd.DataFrame(completion_data)
+# Completed vs remaining tricks per category
+completion_df = analytics.completion_df
 if not completion_df.empty:
-    fig = px.bar(
-        completion_df,
-        x="Category",
-        y="Count",
-        color="Status",
-        title="Completion Status by Category",
-        barmode="stack",
-        color_discrete_map={
-            "Completed": "#2196F3",  # Blue
-            "Remaining": "#BBDEFB"  # Very Light Blue
-        }
-    )
-    fig.update_layout(legend_title_text="")
+    with profile_section("progress.completion_chart"):
+        fig = get_completion_chart(completion_df)
     st.plotly_chart(fig, use_container_width=True)
 
 # Add separator
 st.markdown("---")
 
+# Progress over time, from the daily/weekly counters (never a replay of the whole log)
+st.subheader("Your Progress Over Time")
+period = st.radio("Group by", ["day", "week"], format_func=str.title, horizontal=True, key="timeline_period")
+with profile_section("progress.timeline"):
+    timeline = get_progress_timeline(period)
+if timeline:
+    with profile_section("progress.timeline_chart"):
+        fig = get_timeline_chart(timeline, period)
+    st.plotly_chart(fig, use_container_width=True)
+else:
+    st.info("Your timeline will show up here once you start marking tricks as learned.")
+
+# Add separator
+st.markdown("---")
+
 # Next tricks to learn
 st.subheader("Recommended Next Tricks to Learn")
 
 # Strategy: Find tricks that are slightly harder than the hardest completed trick
-if completed_list:
-    # Get the difficulty of the hardest completed trick
-    completed_tricks_df = df[df['Trick'].isin(completed_list)]
-    if not completed_tricks_df.empty:
-        max_completed_difficulty = completed_tricks_df['Difficulty'].max()
-
-        # Find tricks that are 5-15 points harder than the hardest completed trick
-        next_tricks = df[
-            (df['Difficulty'] > max_completed_difficulty) &
-            (df['Difficulty'] <= max_completed_difficulty + 15) &
-            (~df['Trick'].isin(completed_list))
-            ].sort_values('Difficulty')
-
+if analytics.has_completed:
+    # Tricks up to 15 points harder than the hardest completed trick
+    next_tricks = analytics.next_tricks
+    if next_tricks is not None:
         if not next_tricks.empty:
             st.write("Based on your current skill level, these tricks would be good to learn next:")
             st.dataframe(
-                next_tricks[['Trick', 'Difficulty', 'Category']],
+                next_tricks,
                 column_config={
                     "Trick": "Trick Name",
                     "Difficulty": st.column_config.ProgressColumn(
@@ -161,10 +118,10 @@ if completed_list:
         st.info("No completed tricks found. Start with some beginner tricks!")
 else:
     # If no tricks completed, recommend beginner tricks
-    beginner_tricks = df[df['Category'] == 'Beginner'].sort_values('Difficulty')
+    beginner_tricks = analytics.beginner_tricks
     st.write("You haven't marked any tricks as learned yet. Here are some beginner tricks to start with:")
     st.dataframe(
-        beginner_tricks[['Trick', 'Difficulty', 'Category']],
+        beginner_tricks,
         column_config={
             "Trick": "Trick Name",
             "Difficulty": st.column_config.ProgressColumn(
@@ -179,16 +136,56 @@ else:
         use_container_width=True
     )
 
+# Plan a route to a goal trick through the prerequisite graph
+st.subheader("Plan Your Learning Path")
+
+trick_index = get_trick_index()
+prerequisite_graph = get_prerequisite_graph()
+completed_set = set(completed_tricks['completed'])
+
+# Goal tricks: anything not learned yet that builds on other tricks, easiest first
+goal_options = [
+    trick[0] for trick in trick_index.tricks
+    if trick[0] not in completed_set and prerequisite_graph.has_prerequisites(trick[0])
+]
+
+if goal_options:
+    goal_trick = st.selectbox("Pick a trick you want to learn:", goal_options, key="learning_path_goal")
+
+    with profile_section("progress.learning_path"):
+        learning_plan = prerequisite_graph.learning_plan(goal_trick, completed_set)
+
+    st.write(f"Learn these {len(learning_plan)} tricks in order to get to **{goal_trick}**:")
+    st.dataframe(
+        [
+            {"Step": step, "Trick": name, "Difficulty": trick_index.get_trick(name)[1],
+             "Category": trick_index.get_trick(name)[2]}
+            for step, name in enumerate(learning_plan, 1)
+        ],
+        column_config={
+            "Trick": "Trick Name",
+            "Difficulty": st.column_config.ProgressColumn(
+                "Difficulty",
+                format="%d / 100",
+                min_value=0,
+                max_value=100,
+            ),
+            "Category": "Difficulty Level"
+        },
+        hide_index=True,
+        use_container_width=True
+    )
+else:
+    st.info("You've learned every trick that has prerequisites. Nice work!")
+
 # Top 10 hardest tricks table
 st.subheader("Top 10 Hardest Tricks")
 
-hardest_tricks = df.sort_values('Difficulty', ascending=False).head(10)
-hardest_tricks['Status'] = hardest_tricks['Trick'].apply(
-    lambda x: "✅ Learned" if x in completed_list else "❌ Not Yet")
+hardest_tricks = analytics.hardest_tricks
 
 # Display as a table
 st.dataframe(
-    hardest_tricks[['Trick', 'Difficulty', 'Category', 'Status']],
+    hardest_tricks,
     column_config={
         "Trick": "Trick Name",
         "Difficulty": st.column_config.ProgressColumn(
@@ -0,0 +1,212 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from utils import CATEGORIES
+
+
+# Small thread-safe LRU cache shared by every session in the process
+class LRUCache:
+    """Bounded mapping that evicts the least recently used entry"""
+
+    def __init__(self, max_size=128):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+@dataclass(frozen=True)
+class ProgressAnalytics:
+    """Everything the progress page shows; shared between sessions, so treat the frames as read-only"""
+    total_tricks: int
+    completed_count: int
+    category_counts: pd.Series
+    completion_df: pd.DataFrame
+    has_completed: bool
+    next_tricks: pd.DataFrame | None
+    beginner_tricks: pd.DataFrame
+    hardest_tricks: pd.DataFrame
+
+
+# Function to compute the progress page aggregates in a few vectorized passes
+def compute_progress_analytics(df, completed):
+    """Compute all progress aggregates for one catalog and one set of completed tricks"""
+    completed_mask = df['Trick'].isin(completed)
+
+    # Tricks per category, in display order
+    category_counts = df['Category'].value_counts().reindex(CATEGORIES).fillna(0)
+
+    # Completed vs remaining per category, as (Category, Status, Count) rows for a stacked bar
+    totals = df.groupby('Category')['Trick'].count()
+    done = completed_mask.groupby(df['Category']).sum()
+    present = [category for category in CATEGORIES if category in totals.index]
+    status_counts = pd.DataFrame({
+        "Completed": done.reindex(present),
+        "Remaining": totals.reindex(present) - done.reindex(present)
+    })
+    completion_df = status_counts.stack().rename_axis(["Category", "Status"]).reset_index(name="Count")
+
+    # Next tricks: up to 15 points harder than the hardest completed trick
+    next_tricks = None
+    if completed_mask.any():
+        max_completed_difficulty = df.loc[completed_mask, 'Difficulty'].max()
+        next_tricks = df.loc[
+            (df['Difficulty'] > max_completed_difficulty) &
+            (df['Difficulty'] <= max_completed_difficulty + 15) &
+            ~completed_mask,
+            ['Trick', 'Difficulty', 'Category']
+        ].sort_values('Difficulty')
+
+    beginner_tricks = df.loc[df['Category'] == 'Beginner', ['Trick', 'Difficulty', 'Category']].sort_values('Difficulty')
+
+    # Top 10 hardest tricks with the user's status
+    hardest_tricks = df.sort_values('Difficulty', ascending=False).head(10)[['Trick', 'Difficulty', 'Category']]
+    hardest_tricks = hardest_tricks.assign(
+        Status=np.where(hardest_tricks['Trick'].isin(completed), "✅ Learned", "❌ Not Yet")
+    )
+
+    return ProgressAnalytics(
+        total_tricks=len(df),
+        completed_count=int(completed_mask.sum()),
+        category_counts=category_counts,
+        completion_df=completion_df,
+        has_completed=bool(completed),
+        next_tricks=next_tricks,
+        beginner_tricks=beginner_tricks,
+        hardest_tricks=hardest_tricks
+    )
+
+
+analytics_cache = LRUCache(max_size=256)
+
+
+# Function to get (cached) progress analytics for the current catalog and completed tricks
+def get_progress_analytics(global_data, completed_list):
+    """Get the progress aggregates, reusing the cached result while catalog and progress are unchanged"""
+    completed = frozenset(completed_list)
+    key = (global_data["version"], completed)
+
+    analytics = analytics_cache.get(key)
+    if analytics is None:
+        analytics = compute_progress_analytics(global_data["df_tricks"], completed)
+        analytics_cache.put(key, analytics)
+    return analytics
+
+
+# Colors for each chart, kept next to the figure builders that use them
+CATEGORY_COLORS = {
+    "Beginner": "#C5E1A5",
+    "Easy": "#66BB6A",
+    "Intermediate": "#26A69A",
+    "Advanced": "#5C6BC0",
+    "Expert": "#283593"
+}
+
+STATUS_COLORS = {
+    "Completed": "#2196F3",  # Blue
+    "Remaining": "#BBDEFB"  # Very Light Blue
+}
+
+# Built figures, keyed on the aggregates they plot. Figures (rather than their JSON) are cached
+# because st.plotly_chart re-validates a plain dict, which costs most of what building it does
+figure_cache = LRUCache(max_size=64)
+
+
+# Function to reuse a figure while the data it plots is unchanged
+def get_cached_figure(key, build):
+    """Get the figure cached under key, building (and caching) it on a miss"""
+    figure = figure_cache.get(key)
+    if figure is None:
+        figure = build()
+        figure_cache.put(key, figure)
+    return figure
+
+
+# Function to get the "tricks by difficulty category" bar chart
+def get_category_chart(category_counts):
+    """Bar chart of how many tricks each difficulty category has"""
+    def build():
+        # plotly is only imported once a chart is actually drawn
+        import plotly.express as px
+
+        fig = px.bar(
+            x=category_counts.index,
+            y=category_counts.values,
+            labels={'x': 'Difficulty Category', 'y': 'Number of Tricks'},
+            title='Distribution of Tricks by Difficulty',
+            color=category_counts.index,
+            color_discrete_map=CATEGORY_COLORS
+        )
+        fig.update_layout(coloraxis_showscale=False)
+        return fig
+
+    return get_cached_figure(("category", tuple(category_counts.items())), build)
+
+
+# Function to get the stacked completed/remaining bar chart
+def get_completion_chart(completion_df):
+    """Stacked bar chart of completed vs remaining tricks per category"""
+    def build():
+        import plotly.express as px
+
+        fig = px.bar(
+            completion_df,
+            x="Category",
+            y="Count",
+            color="Status",
+            title="Completion Status by Category",
+            barmode="stack",
+            color_discrete_map=STATUS_COLORS
+        )
+        fig.update_layout(legend_title_text="")
+        return fig
+
+    return get_cached_figure(("completion", tuple(completion_df.itertuples(index=False))), build)
+
+
+# Function to get the tricks learned over time chart
+def get_timeline_chart(timeline, period):
+    """Bar chart of tricks learned (and unmarked) per day or week, with the running net total"""
+    def build():
+        import plotly.graph_objects as go
+
+        buckets = [bucket for bucket, _, _ in timeline]
+        learned = [learned for _, learned, _ in timeline]
+        unlearned = [-unlearned for _, _, unlearned in timeline]
+        net_total = np.cumsum([a + b for a, b in zip(learned, unlearned)])
+
+        fig = go.Figure([
+            go.Bar(x=buckets, y=learned, name="Learned", marker_color=STATUS_COLORS["Completed"]),
+            go.Bar(x=buckets, y=unlearned, name="Unmarked", marker_color=STATUS_COLORS["Remaining"]),
+            go.Scatter(x=buckets, y=net_total, name="Net total", mode="lines+markers", line_color="#283593"),
+        ])
+        fig.update_layout(
+            title=f"Tricks Learned per {period.title()}",
+            barmode="relative",
+            xaxis_title=period.title(),
+            yaxis_title="Tricks",
+            legend_title_text=""
+        )
+        return fig
+
+    return get_cached_figure(("timeline", period, tuple(timeline)), build)
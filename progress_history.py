@@ -0,0 +1,192 @@
+import atexit
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from file_lock import file_lock
+
+
+logger = logging.getLogger(__name__)
+
+# Compact the log into a snapshot once this many events have been appended since the last one
+COMPACT_EVENTS = 10000
+
+# Bucket sizes the counters are kept for
+PERIODS = ("day", "week")
+
+
+# Function to get the day and week buckets an event falls into
+def event_buckets(timestamp):
+    """Return (ISO day, ISO date of the Monday starting its week) in local time"""
+    day = datetime.fromtimestamp(timestamp).date()
+    return day.isoformat(), (day - timedelta(days=day.weekday())).isoformat()
+
+
+# Append-only log of every "Mark as Learned" toggle, with per-user daily/weekly counters kept up to date as it grows
+class ProgressHistory:
+    """Event log plus incrementally maintained counters, appended by a background writer so recording never waits on
+    the disk, and compacted into a snapshot every COMPACT_EVENTS events"""
+
+    def __init__(self, directory, compact_events=COMPACT_EVENTS, flush_interval=1.0):
+        # Absolute, so the log doesn't move if the working directory changes later
+        self.directory = os.path.abspath(directory)
+        self.compact_events = compact_events
+        self.flush_interval = flush_interval
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.snapshot_path = os.path.join(self.directory, "snapshot.json")
+        # Serializes appends and compactions across server processes
+        self.lock_path = os.path.join(self.directory, "history.lock")
+        self._lock = threading.Lock()
+
+        # Events not yet in the log: queued ones, and the batch being written right now
+        self._queue = []
+        self._inflight = []
+        self._queue_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+
+        # Log generation and byte offset the counters have caught up to
+        self.generation = 0
+        self.offset = 0
+        self.events_since_snapshot = 0
+        # period -> user_id -> bucket -> [learned, unlearned]
+        self.counters = {period: {} for period in PERIODS}
+
+        with self._lock:
+            self._load_snapshot()
+            self._catch_up()
+
+        self._thread = threading.Thread(target=self._run, name="progress-history-writer", daemon=True)
+        self._thread.start()
+        # Write whatever is still queued when the server process exits
+        atexit.register(self.close)
+
+    def log_path(self, generation):
+        return os.path.join(self.directory, f"events.{generation}.log")
+
+    def _load_snapshot(self):
+        try:
+            with open(self.snapshot_path, 'r') as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return
+        self.generation = snapshot["generation"]
+        self.offset = 0
+        self.events_since_snapshot = 0
+        self.counters = snapshot["counters"]
+
+    def _apply(self, timestamp, user_id, completed):
+        day, week = event_buckets(timestamp)
+        for period, bucket in zip(PERIODS, (day, week)):
+            counts = self.counters[period].setdefault(user_id, {}).setdefault(bucket, [0, 0])
+            counts[0 if completed else 1] += 1
+
+    def _catch_up(self):
+        """Apply events other writers (or other processes) appended since we last looked"""
+        # If our log is gone, another process compacted it into a newer snapshot
+        if not os.path.exists(self.log_path(self.generation)) and os.path.exists(self.snapshot_path):
+            self._load_snapshot()
+
+        try:
+            with open(self.log_path(self.generation), 'rb') as f:
+                f.seek(self.offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+
+        # Only whole lines; a line still being written is picked up next time
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            timestamp, user_id, _, completed = json.loads(line)
+            self._apply(timestamp, user_id, completed)
+            self.events_since_snapshot += 1
+        self.offset += end
+
+    def record(self, user_id, trick_name, completed, timestamp=None):
+        """Queue one toggle for the log; the counters include it straight away"""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._queue_lock:
+            self._queue.append((round(timestamp, 3), user_id, trick_name, int(completed)))
+
+    def flush(self):
+        """Append every queued toggle to the log and update the counters"""
+        with self._flush_lock:
+            with self._queue_lock:
+                events, self._queue = self._queue, []
+                self._inflight = events
+            if not events:
+                return
+            lines = "".join(json.dumps(event, separators=(",", ":")) + "\n" for event in events)
+            try:
+                with self._lock, file_lock(self.lock_path):
+                    self._catch_up()
+                    with open(self.log_path(self.generation), 'a') as f:
+                        f.write(lines)
+                    self._catch_up()
+                    # Still under self._lock, so history() never sees the events twice or not at all
+                    with self._queue_lock:
+                        self._inflight = []
+                    if self.events_since_snapshot >= self.compact_events:
+                        self._compact()
+            except Exception:
+                # Put the batch back in front of anything queued since and try again on the next flush
+                logger.exception("Failed to write progress history, will retry")
+                with self._queue_lock:
+                    if self._inflight:
+                        self._queue[:0] = self._inflight
+                        self._inflight = []
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+        atexit.unregister(self.close)
+
+    def _compact(self):
+        """Fold the log into a new snapshot and start an empty log (called with both locks held)"""
+        generation = self.generation + 1
+        open(self.log_path(generation), 'w').close()
+
+        # The snapshot swap is the commit point: before it the old log is replayed, after it the new one
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, 'w') as f:
+            json.dump({"generation": generation, "counters": self.counters}, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+        old_log = self.log_path(self.generation)
+        self.generation = generation
+        self.offset = 0
+        self.events_since_snapshot = 0
+        os.remove(old_log)
+
+    def history(self, user_id, period="day"):
+        """Get [(bucket start date, learned, unlearned)] for a user, oldest first; O(buckets) once caught up"""
+        with self._lock:
+            self._catch_up()
+            buckets = {bucket: list(counts) for bucket, counts in self.counters[period].get(user_id, {}).items()}
+            with self._queue_lock:
+                unwritten = self._inflight + self._queue
+
+        # Count toggles that haven't reached the log yet, so users see their own changes straight away
+        for timestamp, event_user, _, completed in unwritten:
+            if event_user == user_id:
+                bucket = event_buckets(timestamp)[PERIODS.index(period)]
+                buckets.setdefault(bucket, [0, 0])[0 if completed else 1] += 1
+        return [(date.fromisoformat(bucket), *buckets[bucket]) for bucket in sorted(buckets)]
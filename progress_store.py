@@ -0,0 +1,352 @@
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from file_lock import file_lock
+
+
+logger = logging.getLogger(__name__)
+
+
+# Key used for progress recorded before per-user tracking existed
+DEFAULT_USER = "default"
+
+
+# Base class that every progress backend implements
+class ProgressStore:
+    """Per-user storage of completed tricks"""
+
+    def get_completed(self, user_id):
+        """Return the list of tricks the user has completed"""
+        raise NotImplementedError
+
+    def set_completed(self, user_id, trick_name, completed):
+        """Mark a single trick as completed (or not) for the user"""
+        raise NotImplementedError
+
+    def apply_changes(self, changes):
+        """Apply a batch of {user_id: {trick: completed}} changes"""
+        for user_id, tricks in changes.items():
+            for trick_name, completed in tricks.items():
+                self.set_completed(user_id, trick_name, completed)
+
+    def close(self):
+        """Release any resources held by the store"""
+
+
+# SQLite backend: one row per (user, trick), written with single-row upserts
+class SQLiteProgressStore(ProgressStore):
+    """Progress store backed by a SQLite database in WAL mode"""
+
+    def __init__(self, path):
+        # Absolute, so the database doesn't move if the working directory changes later
+        self.path = os.path.abspath(path)
+        # Streamlit runs every rerun on a new thread, so one connection per thread would pile up;
+        # instead every thread shares one connection and takes turns on it
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+
+        with self._lock, self._conn as conn:
+            # WAL lets other server processes keep reading while a toggle is being written
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS completed_tricks (
+                    user_id TEXT NOT NULL,
+                    trick TEXT NOT NULL,
+                    completed_at REAL NOT NULL,
+                    PRIMARY KEY (user_id, trick)
+                ) WITHOUT ROWID
+                """
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+
+    def get_completed(self, user_id):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT trick FROM completed_tricks WHERE user_id = ? ORDER BY completed_at, trick",
+                (user_id,),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def set_completed(self, user_id, trick_name, completed):
+        # "with conn" wraps the statement in a transaction that commits or rolls back as a unit
+        with self._lock, self._conn as conn:
+            if completed:
+                conn.execute(
+                    """
+                    INSERT INTO completed_tricks (user_id, trick, completed_at) VALUES (?, ?, ?)
+                    ON CONFLICT (user_id, trick) DO NOTHING
+                    """,
+                    (user_id, trick_name, time.time()),
+                )
+            else:
+                conn.execute(
+                    "DELETE FROM completed_tricks WHERE user_id = ? AND trick = ?",
+                    (user_id, trick_name),
+                )
+
+    def apply_changes(self, changes):
+        now = time.time()
+        with self._lock:
+            # Batches are few and far between, so make each one fully durable (fsync on commit)
+            self._conn.execute("PRAGMA synchronous=FULL")
+            try:
+                with self._conn as conn:
+                    self._apply_batch(conn, changes, now)
+            finally:
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+
+    @staticmethod
+    def _apply_batch(conn, changes, now):
+        conn.executemany(
+            """
+            INSERT INTO completed_tricks (user_id, trick, completed_at) VALUES (?, ?, ?)
+            ON CONFLICT (user_id, trick) DO NOTHING
+            """,
+            [
+                (user_id, trick_name, now)
+                for user_id, tricks in changes.items()
+                for trick_name, completed in tricks.items() if completed
+            ],
+        )
+        conn.executemany(
+            "DELETE FROM completed_tricks WHERE user_id = ? AND trick = ?",
+            [
+                (user_id, trick_name)
+                for user_id, tricks in changes.items()
+                for trick_name, completed in tricks.items() if not completed
+            ],
+        )
+
+    def get_meta(self, key):
+        """Read a value from the meta table"""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def import_completed(self, completed_by_user, meta_key=None):
+        """Bulk-insert {user_id: [tricks]} in one transaction, optionally recording a meta flag"""
+        now = time.time()
+        with self._lock, self._conn as conn:
+            conn.executemany(
+                """
+                INSERT INTO completed_tricks (user_id, trick, completed_at) VALUES (?, ?, ?)
+                ON CONFLICT (user_id, trick) DO NOTHING
+                """,
+                [
+                    (user_id, trick_name, now)
+                    for user_id, trick_names in completed_by_user.items()
+                    for trick_name in trick_names
+                ],
+            )
+            if meta_key is not None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (meta_key, str(now))
+                )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# JSON backend kept for compatibility with the original completed_tricks.json file
+class JsonProgressStore(ProgressStore):
+    """Progress store backed by a JSON file, rewritten atomically on every change"""
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self._lock = threading.Lock()
+        # The thread lock covers sessions in this process; the file lock covers other server processes
+        self.lock_path = f"{self.path}.lock"
+
+    def _read(self):
+        """Read the JSON document, creating an empty one if the file doesn't exist"""
+        if not os.path.exists(self.path):
+            data = {"completed": []}
+            self._write(data)
+            return data
+        with open(self.path, 'r') as f:
+            return json.load(f)
+
+    def _write(self, data):
+        """Write the JSON document to a temp file and swap it in, so readers never see a partial file"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".completed_tricks.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @staticmethod
+    def _user_list(data, user_id):
+        """Get the completed list for a user, keeping the legacy top-level list for the default user"""
+        if user_id == DEFAULT_USER:
+            return data.setdefault("completed", [])
+        return data.setdefault("users", {}).setdefault(user_id, [])
+
+    def get_completed(self, user_id):
+        with self._lock, file_lock(self.lock_path):
+            return list(self._user_list(self._read(), user_id))
+
+    def set_completed(self, user_id, trick_name, completed):
+        # Hold both locks across read-modify-write so concurrent toggles can't drop each other
+        with self._lock, file_lock(self.lock_path):
+            data = self._read()
+            completed_list = self._user_list(data, user_id)
+            if completed and trick_name not in completed_list:
+                completed_list.append(trick_name)
+            elif not completed and trick_name in completed_list:
+                completed_list.remove(trick_name)
+            else:
+                return
+            self._write(data)
+
+    def apply_changes(self, changes):
+        # One read and one rewrite for the whole batch
+        with self._lock, file_lock(self.lock_path):
+            data = self._read()
+            for user_id, tricks in changes.items():
+                completed_list = self._user_list(data, user_id)
+                for trick_name, completed in tricks.items():
+                    if completed and trick_name not in completed_list:
+                        completed_list.append(trick_name)
+                    elif not completed and trick_name in completed_list:
+                        completed_list.remove(trick_name)
+            self._write(data)
+
+
+# Wrapper that queues toggles in memory and writes them to the real store in batches
+class WriteBehindProgressStore(ProgressStore):
+    """Coalesce toggles per user and flush them from a background thread, on an interval or once enough are queued"""
+
+    def __init__(self, store, flush_interval=1.0, max_pending=256):
+        self.store = store
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        # user_id -> {trick: completed}; a trick toggled on and off again before a flush is written once (or not at all)
+        self._pending = {}
+        self._pending_count = 0
+        # The batch being written right now; still overlaid until the store has committed it
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._run, name="progress-flusher", daemon=True)
+        self._thread.start()
+        # Flush whatever is still queued when the server process exits
+        atexit.register(self.close)
+
+    def get_completed(self, user_id):
+        # Take the overlay before reading the store: if a flush commits in between, the store
+        # already has what the overlay says, so nothing the user did is ever missing
+        with self._lock:
+            pending = {**self._inflight.get(user_id, {}), **self._pending.get(user_id, {})}
+        completed = self.store.get_completed(user_id)
+        if not pending:
+            return completed
+
+        # Overlay queued toggles so a user always sees their own changes straight away
+        completed = [trick_name for trick_name in completed if pending.get(trick_name, True)]
+        completed_set = set(completed)
+        completed.extend(
+            trick_name for trick_name, is_completed in pending.items()
+            if is_completed and trick_name not in completed_set
+        )
+        return completed
+
+    def set_completed(self, user_id, trick_name, completed):
+        # Never touches the disk, so a checkbox click doesn't wait on I/O
+        with self._lock:
+            user_pending = self._pending.setdefault(user_id, {})
+            if trick_name not in user_pending:
+                self._pending_count += 1
+            user_pending[trick_name] = completed
+            if self._pending_count >= self.max_pending:
+                self._wake.set()
+
+    def flush(self):
+        """Write every queued change to the underlying store"""
+        with self._flush_lock:
+            with self._lock:
+                changes, self._pending, self._pending_count = self._pending, {}, 0
+                self._inflight = changes
+            if not changes:
+                return
+            try:
+                self.store.apply_changes(changes)
+            except Exception:
+                # Requeue the batch (behind anything queued since) and try again on the next flush
+                logger.exception("Failed to flush progress changes, will retry")
+                with self._lock:
+                    for user_id, tricks in changes.items():
+                        user_pending = self._pending.setdefault(user_id, {})
+                        self._pending_count += sum(trick_name not in user_pending for trick_name in tricks)
+                        self._pending[user_id] = {**tricks, **user_pending}
+                    self._inflight = {}
+            else:
+                with self._lock:
+                    self._inflight = {}
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+        self.store.close()
+        atexit.unregister(self.close)
+
+
+# Function to import an existing completed_tricks.json into a SQLite store
+def migrate_json_to_sqlite(json_path, store):
+    """Copy progress from a legacy JSON file into the SQLite store (runs once per file)"""
+    meta_key = f"migrated:{os.path.abspath(json_path)}"
+    if not os.path.exists(json_path) or store.get_meta(meta_key) is not None:
+        return False
+
+    with open(json_path, 'r') as f:
+        data = json.load(f)
+
+    # Legacy files only have the shared top-level list, which becomes the default user
+    completed_by_user = dict(data.get("users", {}))
+    completed_by_user[DEFAULT_USER] = data.get("completed", [])
+    store.import_completed(completed_by_user, meta_key=meta_key)
+    return True
+
+
+# Function to build the configured progress store
+def create_progress_store(backend="sqlite", sqlite_path="progress.db", json_path="completed_tricks.json",
+                          write_behind=False):
+    """Create a progress store for the given backend name ("sqlite" or "json"), optionally with write-behind batching"""
+    if backend == "json":
+        store = JsonProgressStore(json_path)
+    elif backend == "sqlite":
+        store = SQLiteProgressStore(sqlite_path)
+        migrate_json_to_sqlite(json_path, store)
+    else:
+        raise ValueError(f"Unknown progress backend: {backend}")
+    return WriteBehindProgressStore(store) if write_behind else store
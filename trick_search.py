@@ -0,0 +1,136 @@
+import bisect
+import functools
+import heapq
+from collections import Counter
+
+
+# Longest n-gram kept in the index; shorter queries are answered straight from their posting list
+NGRAM_SIZE = 3
+
+# How many of the best n-gram candidates get a full edit-distance check
+FUZZY_CANDIDATES = 200
+
+# Match kinds, best first (used to rank results)
+EXACT, PREFIX, WORD_PREFIX, SUBSTRING, FUZZY = range(5)
+
+
+# Function to list the n-grams (of one length) in a string
+def ngrams(text, size):
+    """Return the set of substrings of the given length in text"""
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+# Function to measure how closely a query matches anywhere inside a name
+def substring_edit_distance(query, text, max_distance):
+    """Smallest edit distance between query and any substring of text, or None if above max_distance"""
+    # Sellers' variant of Levenshtein: a match may start anywhere in text, so row 0 is all zeros
+    previous = [0] * (len(text) + 1)
+    for i, query_char in enumerate(query, 1):
+        current = [i]
+        for j, text_char in enumerate(text, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (query_char != text_char)
+            ))
+        # Every later row is at least this row's minimum, so stop as soon as it's out of range
+        if min(current) > max_distance:
+            return None
+        previous = current
+
+    distance = min(previous)
+    return distance if distance <= max_distance else None
+
+
+# Search index over trick names, built once per catalog load
+class TrickSearchIndex:
+    """Literal substring, prefix and typo-tolerant search over trick names"""
+
+    def __init__(self, names, cache_size=256):
+        self.names = list(names)
+        self.lower_names = [name.lower() for name in self.names]
+
+        # n-gram -> ids of the names containing it, for every n-gram of length 1..NGRAM_SIZE
+        self.postings = {}
+        for name_id, lower_name in enumerate(self.lower_names):
+            for size in range(1, NGRAM_SIZE + 1):
+                for gram in ngrams(lower_name, size):
+                    self.postings.setdefault(gram, set()).add(name_id)
+
+        # Sorted (name, id) pairs so prefix lookups are a binary search
+        self.sorted_names = sorted((lower_name, name_id) for name_id, lower_name in enumerate(self.lower_names))
+
+        # Memoize recent queries; lru_cache is thread-safe, which matters with one index per process
+        self.search = functools.lru_cache(maxsize=cache_size)(self._search)
+
+    def prefix(self, query):
+        """Get the ids of names starting with query, in alphabetical order"""
+        query = query.lower()
+        start = bisect.bisect_left(self.sorted_names, (query,))
+        ids = []
+        for lower_name, name_id in self.sorted_names[start:]:
+            if not lower_name.startswith(query):
+                break
+            ids.append(name_id)
+        return ids
+
+    def substring(self, query):
+        """Get the ids of names containing query as a literal (case-insensitive) substring"""
+        query = query.lower()
+        if not query:
+            return []
+        if len(query) <= NGRAM_SIZE:
+            return sorted(self.postings.get(query, ()))
+
+        # Every n-gram of the query must appear in the name; intersect the rarest lists first
+        posting_lists = sorted((self.postings.get(gram, set()) for gram in ngrams(query, NGRAM_SIZE)), key=len)
+        candidates = set.intersection(*posting_lists)
+        return sorted(name_id for name_id in candidates if query in self.lower_names[name_id])
+
+    def fuzzy(self, query, max_distance=2):
+        """Get (distance, id) pairs for names that match query within max_distance edits, best first"""
+        query = query.lower()
+        if len(query) < NGRAM_SIZE:
+            return []
+
+        # Short queries get one typo, longer ones two
+        max_distance = min(max_distance, 1 if len(query) <= 4 else 2)
+
+        # Only names sharing the most n-grams with the query get a full edit-distance check,
+        # which keeps the cost bounded no matter how large the catalog grows
+        shared = Counter()
+        for gram in ngrams(query, NGRAM_SIZE):
+            shared.update(self.postings.get(gram, ()))
+        candidates = heapq.nlargest(FUZZY_CANDIDATES, shared, key=lambda name_id: (shared[name_id], -name_id))
+
+        matches = []
+        for name_id in candidates:
+            distance = substring_edit_distance(query, self.lower_names[name_id], max_distance)
+            if distance is not None:
+                matches.append((distance, name_id))
+        return sorted(matches)
+
+    def _match_kind(self, query, name_id):
+        """Classify how a literal match lines up with the name, for ranking"""
+        lower_name = self.lower_names[name_id]
+        if lower_name == query:
+            return EXACT
+        if lower_name.startswith(query):
+            return PREFIX
+        if (" " + query) in lower_name or ("-" + query) in lower_name:
+            return WORD_PREFIX
+        return SUBSTRING
+
+    def _search(self, query):
+        """Ranked trick names matching query, falling back to typo-tolerant matching"""
+        query = query.strip().lower()
+        if not query:
+            return ()
+
+        # Literal matches rank exact > prefix > word prefix > anywhere, then by catalog order
+        literal = sorted((self._match_kind(query, name_id), name_id) for name_id in self.substring(query))
+        if literal:
+            return tuple(self.names[name_id] for _, name_id in literal)
+
+        # Nothing matches literally, so treat the query as possibly misspelt
+        return tuple(self.names[name_id] for _, name_id in self.fuzzy(query))
@@ -1,8 +1,36 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import pandas as pd
+import bisect
+import functools
+import html
+import importlib
 import json
+import logging
 import os
+import pickle
 import re
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from urllib.parse import urlencode
+
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from catalog_snapshot import read_catalog_table, write_catalog_snapshot
+from file_lock import file_lock
+from hot_reload import SnapshotReloader
+from learning_path import load_prerequisite_graph
+from progress_history import ProgressHistory
+from progress_store import DEFAULT_USER, create_progress_store
+from trick_search import TrickSearchIndex
+from video_catalog import load_video_catalog
+from video_metadata import METADATA_STAMP, load_cached_metadata
+
+
+logger = logging.getLogger(__name__)
 
 
 # Function to extract YouTube video ID from URL
@@ -27,7 +55,6 @@ def extract_youtube_id(url):
 
 
 # Create a function to load or create the tricks database
-@st.cache_data
 def load_tricks_data():
     """Load the skateboarding tricks data from CSV file"""
     try:
@@ -59,6 +86,9 @@ def create_default_data():
     return df
 
 
+# Difficulty categories, in display order
+CATEGORIES = ["Beginner", "Easy", "Intermediate", "Advanced", "Expert"]
+
 # Define difficulty categories
 def get_difficulty_category(difficulty):
     if difficulty <= 10:
@@ -73,20 +103,164 @@ def get_difficulty_category(difficulty):
         return "Expert"
 
 
+# Keyword rules for trick types, in priority order (the first matching type is a trick's main type)
+TRICK_TYPE_RULES = {
+    "Flip Tricks": ["flip", "heel"],
+    "Shove-Its & Spins": ["shove", "shov", "shuv", "spin", "360", "180", "rotation"],
+    "Ollie-Based Tricks": ["ollie"]
+}
+
+# Trick types used by the Home page filter: every rule's type, plus "Other" for tricks no rule matches
+TRICK_TYPES = list(TRICK_TYPE_RULES) + ["Other"]
+
+
+# Function to classify every trick's type in one vectorized pass
+def classify_trick_types(names, rules=None):
+    """Return a DataFrame with a categorical main 'Type' and a tuple of every matching type in 'Types'"""
+    rules = TRICK_TYPE_RULES if rules is None else rules
+    type_names = list(rules)
+
+    # One alternation with a named group per type, so every keyword hit says which type it belongs to
+    pattern = re.compile("|".join(
+        f"(?P<t{i}>{'|'.join(re.escape(keyword.lower()) for keyword in keywords)})"
+        for i, keywords in enumerate(rules.values())
+    ))
+    matches = names.str.lower().str.extractall(pattern)
+
+    # names x types table of whether any keyword for that type appeared
+    has_type = (
+        matches.notna().groupby(level=0).any()
+        .reindex(index=names.index, columns=[f"t{i}" for i in range(len(type_names))], fill_value=False)
+    )
+    has_type.columns = type_names
+
+    types = [
+        tuple(type_name for type_name, matched in zip(type_names, row) if matched) or ("Other",)
+        for row in has_type.itertuples(index=False)
+    ]
+    return pd.DataFrame({
+        "Type": pd.Categorical([trick_types[0] for trick_types in types], categories=type_names + ["Other"]),
+        "Types": types
+    }, index=names.index)
+
+
+# Precomputed lookups over the trick catalog, built once per catalog load
+class TrickIndex:
+    """Per-trick category and types, plus category -> type -> trick buckets for rendering"""
+
+    __slots__ = ("tricks", "positions", "buckets", "difficulties", "by_type")
+
+    def __init__(self, df):
+        # Each trick is a (name, difficulty, category, types) tuple, sorted by difficulty (ties keep CSV order);
+        # types lists every type the trick matches, main type first
+        self.tricks = tuple(sorted(
+            (
+                (name, int(difficulty), category, types)
+                for name, difficulty, category, types in zip(df['Trick'], df['Difficulty'], df['Category'], df['Types'])
+            ),
+            key=lambda trick: trick[1]
+        ))
+
+        # Bit position of each trick, used for completed-status bitsets
+        self.positions = {trick[0]: i for i, trick in enumerate(self.tricks)}
+
+        # Group into category -> type -> tricks, with "All Tricks" holding the whole category;
+        # a trick with several types (e.g. "360 Flip") goes into each of their buckets
+        buckets = {category: {trick_type: [] for trick_type in ["All Tricks"] + TRICK_TYPES} for category in CATEGORIES}
+        for trick in self.tricks:
+            category_buckets = buckets.setdefault(trick[2], {"All Tricks": []})
+            category_buckets["All Tricks"].append(trick)
+            for trick_type in trick[3]:
+                category_buckets.setdefault(trick_type, []).append(trick)
+        self.buckets = {
+            category: {trick_type: tuple(tricks) for trick_type, tricks in type_buckets.items()}
+            for category, type_buckets in buckets.items()
+        }
+
+        # Difficulty-sorted arrays (whole catalog and per main type) for similar-trick range queries
+        self.difficulties = [trick[1] for trick in self.tricks]
+        by_type = {}
+        for trick in self.tricks:
+            by_type.setdefault(trick[3][0], []).append(trick)
+        self.by_type = {
+            trick_type: (tuple(tricks), [trick[1] for trick in tricks])
+            for trick_type, tricks in by_type.items()
+        }
+
+    def get_tricks(self, category, trick_type="All Tricks"):
+        """Get the tricks in a category, optionally limited to one trick type"""
+        return self.buckets.get(category, {}).get(trick_type, ())
+
+    def get_trick(self, trick_name):
+        """Get the (name, difficulty, category, types) tuple for a trick"""
+        return self.tricks[self.positions[trick_name]]
+
+    def completed_bits(self, completed_names):
+        """Build a bitset with one bit set for each completed trick in the catalog"""
+        bits = 0
+        for name in completed_names:
+            position = self.positions.get(name)
+            if position is not None:
+                bits |= 1 << position
+        return bits
+
+    def is_completed(self, bits, trick_name):
+        """Check a trick's bit in a bitset built by completed_bits"""
+        position = self.positions.get(trick_name)
+        return position is not None and bool(bits >> position & 1)
+
+    @staticmethod
+    def nearest(tricks, difficulties, difficulty, window, exclude, limit):
+        """Up to limit tricks within ±window of difficulty, closest first, skipping names in exclude"""
+        # Walk outwards from the difficulty's position, so this costs O(log n + limit + skipped)
+        right = bisect.bisect_left(difficulties, difficulty)
+        left = right - 1
+        found = []
+        while len(found) < limit:
+            left_gap = difficulty - difficulties[left] if left >= 0 else window + 1
+            right_gap = difficulties[right] - difficulty if right < len(difficulties) else window + 1
+            if min(left_gap, right_gap) > window:
+                break
+            if left_gap <= right_gap:
+                trick = tricks[left]
+                left -= 1
+            else:
+                trick = tricks[right]
+                right += 1
+            if trick[0] not in exclude:
+                found.append(trick)
+        return found
+
+    def similar_tricks(self, trick_name, completed_bits=0, count=5, window=10):
+        """Tricks within ±window difficulty: same type first, then closest; unlearned ones before learned"""
+        if trick_name not in self.positions:
+            return []
+        _, difficulty, _, trick_types = self.get_trick(trick_name)
+        trick_type = trick_types[0]
+
+        # Gather a few more than needed so learned tricks can be pushed to the back
+        limit = count * 2
+        type_tricks, type_difficulties = self.by_type[trick_type]
+        candidates = self.nearest(type_tricks, type_difficulties, difficulty, window, {trick_name}, limit)
+        if len(candidates) < limit:
+            exclude = {trick_name}.union(trick[0] for trick in candidates)
+            candidates += self.nearest(self.tricks, self.difficulties, difficulty, window, exclude,
+                                       limit - len(candidates))
+
+        # Stable sort keeps the type/closeness order within the unlearned and learned groups
+        candidates.sort(key=lambda trick: self.is_completed(completed_bits, trick[0]))
+        return candidates[:count]
+
+
 # Function to create and save video data JSON if it doesn't exist
 def initialize_video_data():
+    """Load trick_videos.json as a VideoCatalog, creating a placeholder file if it doesn't exist"""
     # Check if the video data file exists
     if not os.path.exists('trick_videos.json'):
-        # Create a template for the video data
-        video_data = {}
-
-        # Load the tricks from CSV
-        tricks_df = load_tricks_data()
-
         # Create an entry for each trick with placeholder video URLs
-        for _, row in tricks_df.iterrows():
-            trick_name = row['Trick']
-            video_data[trick_name] = {
+        tricks_df = load_tricks_data()
+        video_data = {
+            trick_name: {
                 "slow_motion": {
                     "url": "",
                     "start_time": None,
@@ -95,43 +269,105 @@ def initialize_video_data():
                 "pro_examples": [],  # List of pro examples with time controls
                 "tutorial": ""  # Single tutorial video URL
             }
+            for trick_name in tricks_df['Trick']
+        }
 
         # Save the video data to a JSON file
         with open('trick_videos.json', 'w') as f:
             json.dump(video_data, f, indent=4)
 
-        return video_data
-    else:
-        # Load existing video data
-        with open('trick_videos.json', 'r') as f:
-            return json.load(f)
-
-
-# Function to load or create the tricks completion data
-def load_completed_tricks():
-    """Load the completed tricks data from JSON file"""
-    if not os.path.exists('completed_tricks.json'):
-        # Create an empty completed tricks list
-        completed_tricks = {
-            "completed": []
-        }
+    # Parse and validate once (YouTube IDs included), reusing the binary cache while the JSON is unchanged
+    return load_video_catalog('trick_videos.json', extract_youtube_id, cache_path='.trick_videos.cache')
 
-        # Save to JSON
-        with open('completed_tricks.json', 'w') as f:
-            json.dump(completed_tricks, f, indent=4)
 
-        return completed_tricks
-    else:
-        # Load existing completed tricks
-        with open('completed_tricks.json', 'r') as f:
-            return json.load(f)
+# Function to open the progress store configured for this deployment
+def open_progress_store():
+    """Open the progress store selected by TRICKY_PROGRESS_BACKEND ("sqlite" by default, or "json")"""
+    backend = os.environ.get("TRICKY_PROGRESS_BACKEND", "sqlite")
+    sqlite_path = os.environ.get("TRICKY_PROGRESS_DB", "progress.db")
+    # Toggles are queued and written in batches unless TRICKY_WRITE_BEHIND=0
+    write_behind = os.environ.get("TRICKY_WRITE_BEHIND", "1") != "0"
+    return create_progress_store(backend, sqlite_path=sqlite_path, json_path='completed_tricks.json',
+                                 write_behind=write_behind)
+
+
+# Function to get the shared progress store, opened once per server process
+@st.cache_resource
+def get_progress_store():
+    """Get the progress store shared by every session"""
+    return open_progress_store()
+
+
+# Function to identify whose progress to read and write
+def get_user_id():
+    """Get the progress key for the current user"""
+    # Signed-in users get their own progress, everyone else shares the default profile
+    if st.experimental_user.get("is_logged_in"):
+        return st.experimental_user.get("email") or DEFAULT_USER
+    return DEFAULT_USER
+
+
+# Function to get the shared progress history (event log plus daily/weekly counters)
+@st.cache_resource
+def get_progress_history():
+    """Open the progress history kept in TRICKY_PROGRESS_HISTORY (progress_history/ by default)"""
+    return ProgressHistory(os.environ.get("TRICKY_PROGRESS_HISTORY", "progress_history"))
 
 
-# Function to save completed tricks
-def save_completed_tricks(completed_tricks):
-    """Save the completed tricks data to JSON file"""
-    with open('completed_tricks.json', 'w') as f:
-        json.dump(completed_tricks, f, indent=4)
+# Function to mark a single trick as completed or not for the current user
+def set_trick_completed(trick_name, completed):
+    """Save one trick's completion state without rewriting the rest of the user's progress"""
+    user_id = get_user_id()
+    get_progress_store().set_completed(user_id, trick_name, completed)
+    get_progress_history().record(user_id, trick_name, completed)
+
+
+# Function to get the current user's progress over time
+def get_progress_timeline(period="day"):
+    """Get [(bucket start date, learned, unlearned)] for the current user, oldest first"""
+    return get_progress_history().history(get_user_id(), period)
+
+
+# Most entries each bounded per-session store keeps (replay counters, replay flags, checkbox keys)
+SESSION_STORE_SIZE = 32
+
+
+# Per-session dict that forgets its least recently used entries, so session memory stays flat
+class SessionLRU(OrderedDict):
+    """Dict that keeps only its max_size most recently used entries"""
+
+    def __init__(self, max_size=SESSION_STORE_SIZE):
+        super().__init__()
+        self.max_size = max_size
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        while len(self) > self.max_size:
+            self.popitem(last=False)
+
+
+# Function to keep only the most recently used session state keys of a group
+def remember_session_key(group, key):
+    """Mark a session state key as used, deleting the group's least recently used key past SESSION_STORE_SIZE"""
+    recent_keys = st.session_state.setdefault(f"recent_{group}_keys", OrderedDict())
+    recent_keys[key] = True
+    recent_keys.move_to_end(key)
+    while len(recent_keys) > SESSION_STORE_SIZE:
+        evicted_key, _ = recent_keys.popitem(last=False)
+        st.session_state.pop(evicted_key, None)
+
+
+# Custom component that wraps the YouTube IFrame Player API, so replays happen in the browser
+youtube_player_component = components.declare_component(
+    "youtube_player",
+    path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "youtube_player")
+)
 
 
 # Function to replay video by incrementing counter
@@ -147,10 +383,32 @@ def replay_video(video_key):
     st.session_state.active_replays[video_key] = True
 
 
+# Function to build a click-to-play placeholder for a YouTube embed
+def build_lite_embed_srcdoc(video_id, play_url):
+    """Build iframe srcdoc HTML that shows the video thumbnail and only loads the player when clicked"""
+    # Clicking the link navigates the iframe itself to the real player, so no JavaScript is needed
+    thumbnail_url = f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"
+    return (
+        "<style>"
+        "*{padding:0;margin:0;overflow:hidden}"
+        "html,body{height:100%;background:#000}"
+        "img,span{position:absolute;width:100%;top:0;bottom:0;margin:auto}"
+        "img{height:100%;object-fit:cover}"
+        "span{height:1.5em;text-align:center;font:48px/1.5 sans-serif;color:#fff;text-shadow:0 0 .5em #000}"
+        "</style>"
+        f"<a href=\"{play_url}\">"
+        f"<img src=\"{thumbnail_url}\" alt=\"Play video\" loading=\"lazy\">"
+        "<span>&#9654;</span>"
+        "</a>"
+    )
+
+
 # Function to display YouTube video with replay button
-def display_video_with_replay(url, start_time=None, end_time=None, button_text="↻ Replay", video_key=None, height=450):
-    # Extract video ID
-    video_id = extract_youtube_id(url)
+def display_video_with_replay(url, start_time=None, end_time=None, button_text="↻ Replay", video_key=None, height=450,
+                              lite=True, player="component", video_id=None):
+    # Extract video ID (catalog clips come with it already parsed)
+    if video_id is None:
+        video_id = extract_youtube_id(url)
     if not video_id:
         st.error(f"Could not extract YouTube video ID from: {url}")
         return
@@ -159,6 +417,20 @@ def display_video_with_replay(url, start_time=None, end_time=None, button_text="
     if video_key is None:
         video_key = f"video_{video_id}"
 
+    # The player component seeks, clips and replays in the browser, so a replay never reruns the script
+    if player == "component":
+        youtube_player_component(
+            video_id=video_id,
+            start_time=start_time,
+            end_time=end_time,
+            button_text=button_text,
+            key=video_key,
+            default=None
+        )
+        return
+
+    # Otherwise fall back to a plain iframe, where a replay reruns the script to reload it
+
     # Make sure counter exists
     if video_key not in st.session_state.video_replay_counters:
         st.session_state.video_replay_counters[video_key] = 0
@@ -174,7 +446,8 @@ def display_video_with_replay(url, start_time=None, end_time=None, button_text="
     video_params.append(f"nocache={st.session_state.video_replay_counters[video_key]}")
 
     # Add autoplay if this specific video is being actively replayed
-    if video_key in st.session_state.active_replays and st.session_state.active_replays[video_key]:
+    is_replaying = video_key in st.session_state.active_replays and st.session_state.active_replays[video_key]
+    if is_replaying:
         video_params.append("autoplay=1")
         # Reset the flag after using it once
         st.session_state.active_replays[video_key] = False
@@ -185,6 +458,13 @@ def display_video_with_replay(url, start_time=None, end_time=None, button_text="
     # Construct final URL
     video_url = f"https://www.youtube.com/embed/{video_id}?{'&'.join(video_params)}"
 
+    # Until the video has been replayed, show a thumbnail that loads the player on click
+    # (loading="lazy" still defers the player for browsers that ignore srcdoc)
+    srcdoc_attr = ""
+    if lite and not is_replaying and st.session_state.video_replay_counters[video_key] == 0:
+        play_url = f"https://www.youtube.com/embed/{video_id}?{'&'.join(video_params + ['autoplay=1'])}"
+        srcdoc_attr = f'srcdoc="{html.escape(build_lite_embed_srcdoc(video_id, play_url), quote=True)}"'
+
     # Display the video using iframe with proper aspect ratio
     st.markdown(
         f'''
@@ -193,6 +473,8 @@ def display_video_with_replay(url, start_time=None, end_time=None, button_text="
             style="position: absolute; top: 0; left: 0; width: 100%; height: 100%;" 
             height="{height}" 
             src="{video_url}" 
+            {srcdoc_attr}
+            loading="lazy"
             frameborder="0" 
             allow="accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture" 
             allowfullscreen>
@@ -207,58 +489,413 @@ def display_video_with_replay(url, start_time=None, end_time=None, button_text="
         pass  # The on_click handler takes care of the action
 
 
+# Function to show untrusted text (e.g. from the URL) literally inside markdown
+def markdown_code(text):
+    """Wrap text in an inline code span that nothing inside it can close, so it can't add links or formatting"""
+    # Line breaks would end the paragraph (and the code span with it)
+    text = " ".join(text.split())
+    fence = "`" * (max((len(run) for run in re.findall("`+", text)), default=0) + 1)
+    return f"{fence} {text} {fence}"
+
+
+# Function to build the shareable URL of a trick's page
+def trick_page_url(trick_name, home_params=None):
+    """Relative link to pages/Trick_Page.py for a trick, e.g. Trick_Page?trick=Kickflip&q=flip"""
+    return f"Trick_Page?{urlencode({'trick': trick_name, **(home_params or {})}, doseq=True)}"
+
+
+# Query params that hold the Home page's search, type filter, page size, "Show more" pages and toggled categories.
+# Trick links are full page loads (a new session), so this state lives in the URL: Home keeps it there, and trick
+# links carry it along so the browser's Back button and the "All Tricks" buttons land on the same Home page.
+HOME_QUERY_PARAMS = ["q", "type", "per_page", "more", "toggled"]
+
+
+# Function to get the Home page state out of the current URL
+def home_query_params():
+    """The Home page query params in the current URL, as lists of values"""
+    return {key: st.query_params.get_all(key) for key in HOME_QUERY_PARAMS if key in st.query_params}
+
+
+# Function to go back to the Home page as it was when its trick link was clicked
+def switch_to_home():
+    # switch_page drops the query params, so hand Home its state through the session instead
+    if any(key in st.query_params for key in HOME_QUERY_PARAMS):
+        st.session_state.home_query_params = home_query_params()
+    st.switch_page("Home.py")
+
+
+# Styles for the trick link grid, made to look like the app's buttons
+TRICK_GRID_STYLE = (
+    "<style>"
+    ".trick-grid{display:grid;grid-template-columns:repeat(var(--columns),minmax(0,1fr));gap:.5rem 1rem;"
+    "margin-bottom:1rem}"
+    ".trick-grid a{display:block;padding:.375rem .75rem;border:1px solid rgba(49,51,63,.2);border-radius:.5rem;"
+    "text-align:center;text-decoration:none;color:inherit}"
+    ".trick-grid a:hover{border-color:#ff4b4b;color:#ff4b4b}"
+    "</style>"
+)
+
+
+# Function to display tricks as a grid of links to their pages
+def display_trick_links(tricks, trick_index, completed_bits, columns=4, home_params=None):
+    """Render (name, difficulty, ...) tricks as one block of links, with a checkmark on completed ones"""
+    # Plain links navigate straight to the trick page: one page run per click, and the URL can be shared.
+    # Each click loads the page in a new session, so anything to keep (see HOME_QUERY_PARAMS) goes in the link.
+    links = "".join(
+        f'<a href="{html.escape(trick_page_url(trick[0], home_params))}" target="_self">'
+        f'{html.escape(trick[0])}{" ✅" if trick_index.is_completed(completed_bits, trick[0]) else ""}</a>'
+        for trick in tricks
+    )
+    st.markdown(f'{TRICK_GRID_STYLE}<div class="trick-grid" style="--columns:{columns}">{links}</div>',
+                unsafe_allow_html=True)
+
+
 # Initialize session state variables needed across pages
 def initialize_session_state():
     """Initialize all the session state variables needed for the application"""
-    # Video replay counters
+    # Video replay counters (bounded, since a long session can view any number of videos)
     if 'video_replay_counters' not in st.session_state:
-        st.session_state.video_replay_counters = {}
+        st.session_state.video_replay_counters = SessionLRU()
 
     # Active replays tracking
     if 'active_replays' not in st.session_state:
-        st.session_state.active_replays = {}
+        st.session_state.active_replays = SessionLRU()
 
-    # Selected trick information (for the trick detail page)
-    if 'selected_trick' not in st.session_state:
-        st.session_state.selected_trick = None
+    # How many pages of each Home grid section are shown
+    if 'grid_pages' not in st.session_state:
+        st.session_state.grid_pages = {}
 
-    if 'selected_difficulty' not in st.session_state:
-        st.session_state.selected_difficulty = None
+    # Which Home categories are open (missing ones use the page's default)
+    if 'open_categories' not in st.session_state:
+        st.session_state.open_categories = {}
 
+    # Pin the current data snapshot for the rest of this run
+    pin_global_data()
 
-# NEW: Function to get global data, loading it only once
-@st.cache_resource
-def get_global_data():
-    """Load and initialize all global data, ensuring it's only loaded once"""
+    # Load the charting modules in the background while this first page renders
+    start_warm_up()
+
+    # Report this session's state size for the server-wide total
+    if PROFILING_ENABLED:
+        record_session_state_size()
+
+
+# Opt-in profiling of named hot-path sections (set TRICKY_PROFILE=1 to enable)
+PROFILING_ENABLED = os.environ.get("TRICKY_PROFILE") == "1"
+
+# How many recent timings are kept per section for the percentiles
+PROFILING_WINDOW = 500
+
+profile_logger = logging.getLogger("tricky.profile")
+section_timings = {}
+section_timings_lock = threading.Lock()
+
+
+@contextmanager
+def profile_section(name):
+    """Time the enclosed block and record it under the given section name"""
+    if not PROFILING_ENABLED:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with section_timings_lock:
+            section_timings.setdefault(name, deque(maxlen=PROFILING_WINDOW)).append(elapsed_ms)
+        # One JSON object per line so the timings are easy to ship to a log pipeline
+        profile_logger.info(json.dumps({"event": "section_timing", "section": name, "ms": round(elapsed_ms, 3)}))
+
+
+def profiled(name):
+    """Decorator version of profile_section"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with profile_section(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Function to summarize the recorded section timings
+def get_section_stats():
+    """Get count, p50 and p95 (in ms) for each section over its rolling window"""
+    with section_timings_lock:
+        snapshot = {name: sorted(timings) for name, timings in section_timings.items()}
+
+    stats = []
+    for name, timings in sorted(snapshot.items()):
+        stats.append({
+            "Section": name,
+            "Count": len(timings),
+            "p50 (ms)": round(timings[int(0.5 * (len(timings) - 1))], 2),
+            "p95 (ms)": round(timings[int(0.95 * (len(timings) - 1))], 2),
+            "Max (ms)": round(timings[-1], 2)
+        })
+    return stats
+
+
+# Per-session state sizes (session ID -> (bytes, last seen)), summed into a server-wide total
+session_state_sizes = {}
+session_state_sizes_lock = threading.Lock()
+
+# Sessions that haven't rerun for this long are dropped from the total
+SESSION_SIZE_TTL = 30 * 60
+
+# Keys that hold objects shared by every session, so they don't count towards any one session
+SHARED_SESSION_KEYS = {"global_data"}
+
+
+# Function to estimate how much memory this session's state holds
+def estimate_session_state_bytes():
+    """Sum the pickled size of every session state value that isn't shared between sessions"""
+    total = 0
+    for key in list(st.session_state):
+        if key in SHARED_SESSION_KEYS:
+            continue
+        value = st.session_state[key]
+        try:
+            total += len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            total += sys.getsizeof(value)
+    return total
+
+
+# Function to record this session's state size
+def record_session_state_size():
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    size = estimate_session_state_bytes()
+    now = time.monotonic()
+    with session_state_sizes_lock:
+        session_state_sizes[ctx.session_id] = (size, now)
+        for session_id, (_, last_seen) in list(session_state_sizes.items()):
+            if now - last_seen > SESSION_SIZE_TTL:
+                del session_state_sizes[session_id]
+    profile_logger.info(json.dumps({"event": "session_state_size", "bytes": size}))
+
+
+# Function to summarize session state memory across the server
+def get_session_state_stats():
+    """Get the number of active sessions and the total and largest session state size in bytes"""
+    with session_state_sizes_lock:
+        sizes = [size for size, _ in session_state_sizes.values()]
+    return {
+        "sessions": len(sizes),
+        "total_bytes": sum(sizes),
+        "max_bytes": max(sizes, default=0)
+    }
+
+
+# Function to display the hidden profiling panel (opened with ?admin=1 while profiling is on)
+def display_profiling_panel():
+    """Show p50/p95 per profiled section, only when profiling is enabled and ?admin=1 is set"""
+    if not PROFILING_ENABLED or st.query_params.get("admin") != "1":
+        return
+
+    st.markdown("---")
+    st.subheader("Section Timings")
+    stats = get_section_stats()
+    if stats:
+        st.dataframe(stats, hide_index=True, use_container_width=True)
+    else:
+        st.info("No timings recorded yet.")
+
+    st.subheader("Session State")
+    session_stats = get_session_state_stats()
+    sessions_col, total_col, max_col = st.columns(3)
+    sessions_col.metric("Active sessions", session_stats["sessions"])
+    total_col.metric("Total session state", f"{session_stats['total_bytes'] / 1024:.1f} KB")
+    max_col.metric("Largest session", f"{session_stats['max_bytes'] / 1024:.1f} KB")
+
+
+if PROFILING_ENABLED and not profile_logger.handlers:
+    # Streamlit doesn't configure a handler for our loggers, so add one that prints INFO lines
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+    profile_logger.addHandler(handler)
+    profile_logger.setLevel(logging.INFO)
+
+
+# Files that the global data is built from; editing either one reloads it
+GLOBAL_DATA_FILES = ['skateboard_tricks.csv', 'trick_videos.json', 'trick_prerequisites.csv', METADATA_STAMP]
+
+
+# Precompiled catalog (the CSV plus its derived columns) that workers memory-map instead of re-parsing
+CATALOG_SNAPSHOT_PATH = '.skateboard_tricks.arrow'
+
+# Multi-process mode (TRICKY_SHARED_CATALOG=1): the catalog DataFrame stays backed by the memory-mapped
+# snapshot, so every server process on the machine shares one copy of it through the page cache
+SHARED_CATALOG = os.environ.get("TRICKY_SHARED_CATALOG") == "1"
+
+
+# Function to build the catalog with its derived columns from the CSV
+def build_catalog():
+    """Load the tricks CSV and add Category, Type and Types"""
     # Load tricks data and add category
     df = load_tricks_data()
     df['Category'] = df['Difficulty'].apply(get_difficulty_category)
 
+    # Classify trick types once per load rather than on every rerun
+    df[['Type', 'Types']] = classify_trick_types(df['Trick'])
+    return df
+
+
+# Function to turn the mapped snapshot into the catalog DataFrame
+def catalog_from_table(table):
+    if SHARED_CATALOG:
+        # Arrow-backed columns point straight into the mapped file instead of copying it
+        df = table.to_pandas(types_mapper=pd.ArrowDtype)
+    else:
+        df = table.to_pandas()
+    df['Types'] = [tuple(types) for types in df['Types']]
+    return df
+
+
+# Function to load the catalog with its derived columns
+def load_catalog():
+    """Load the tricks DataFrame with Category, Type and Types, from the precompiled snapshot while it's current"""
+    if not os.path.exists('skateboard_tricks.csv'):
+        return build_catalog()
+
+    table = read_catalog_table('skateboard_tricks.csv', CATALOG_SNAPSHOT_PATH)
+    if table is not None:
+        return catalog_from_table(table)
+
+    # One process rebuilds a stale snapshot while the others wait, then they all map the same file
+    with file_lock(f"{CATALOG_SNAPSHOT_PATH}.lock"):
+        table = read_catalog_table('skateboard_tricks.csv', CATALOG_SNAPSHOT_PATH)
+        if table is not None:
+            return catalog_from_table(table)
+
+        df = build_catalog()
+        try:
+            write_catalog_snapshot(df, 'skateboard_tricks.csv', CATALOG_SNAPSHOT_PATH)
+        except OSError:
+            logger.warning("Could not write the catalog snapshot to %s", CATALOG_SNAPSHOT_PATH, exc_info=True)
+            return df
+
+    # Map what was just written, so the builder shares the same pages as everyone else
+    table = read_catalog_table('skateboard_tricks.csv', CATALOG_SNAPSHOT_PATH)
+    return catalog_from_table(table) if table is not None else df
+
+
+# Function to build all global data from the CSV and JSON files
+@profiled("build_global_data")
+def build_global_data(version):
+    """Load and initialize all global data (one immutable snapshot per catalog version)"""
+    # Load the catalog with its category and type columns
+    df = load_catalog()
+
+    # Precompute category/type lookups so pages don't scan the DataFrame on every rerun
+    index = TrickIndex(df)
+
+    # Build the search index over the same (difficulty-sorted) trick order
+    search_index = TrickSearchIndex(trick[0] for trick in index.tricks)
+
+    # Load the prerequisite graph used for learning paths
+    prerequisite_graph = load_prerequisite_graph(
+        'trick_prerequisites.csv', {trick[0]: trick[1] for trick in index.tricks}
+    )
+
     # Load video data
     videos = initialize_video_data()
 
-    # Load completed tricks
-    completed = load_completed_tricks()
-
-    # Return everything as a dictionary
+    # Video titles etc. come only from the cache filled by video_metadata.py, never from the network
+    video_ids = set()
+    for trick_videos in videos.videos_by_trick.values():
+        if trick_videos.slow_motion:
+            video_ids.add(trick_videos.slow_motion.video_id)
+        video_ids.update(clip.video_id for clip in trick_videos.pro_examples)
+        if trick_videos.tutorial:
+            video_ids.add(trick_videos.tutorial.video_id)
+    video_ids.discard(None)
+    video_metadata = load_cached_metadata(video_ids)
+
+    # Return everything as a dictionary (progress is per user, so it lives in the progress store)
     return {
+        "version": version,
         "df_tricks": df,
+        "trick_index": index,
+        "search_index": search_index,
+        "prerequisite_graph": prerequisite_graph,
         "video_data": videos,
-        "completed_tricks": completed
+        "video_metadata": video_metadata
     }
 
 
+# Function to import modules that only some pages need, off the request path
+def warm_up_imports():
+    for module_name in ["plotly.express", "progress_analytics"]:
+        importlib.import_module(module_name)
+
+
+# Function to warm process-wide caches once per server process
+@st.cache_resource
+def start_warm_up():
+    """Start importing the charting stack in a background thread, so the first progress page doesn't wait for it"""
+    thread = threading.Thread(target=warm_up_imports, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+# Function to get the reloader that owns the global data, created once per server process
+@st.cache_resource
+def get_data_reloader():
+    """Load the global data once and reload it in the background whenever its files change"""
+    return SnapshotReloader(build_global_data, GLOBAL_DATA_FILES)
+
+
+# Function to pin the latest snapshot to the current session
+def pin_global_data():
+    """Use the latest global data for this run; a reload mid-run won't mix old and new data"""
+    st.session_state.global_data = get_data_reloader().get()
+
+
+# Function to get global data for the current run
+@profiled("get_global_data")
+def get_global_data():
+    """Get the global data snapshot pinned for this run"""
+    if 'global_data' not in st.session_state:
+        pin_global_data()
+    return st.session_state.global_data
+
+
 # Function to access global data
 def get_tricks_df():
     """Get the tricks dataframe"""
     return get_global_data()["df_tricks"]
 
 
+def get_trick_index():
+    """Get the precomputed trick index"""
+    return get_global_data()["trick_index"]
+
+
+def get_search_index():
+    """Get the trick name search index"""
+    return get_global_data()["search_index"]
+
+
+def get_prerequisite_graph():
+    """Get the trick prerequisite graph"""
+    return get_global_data()["prerequisite_graph"]
+
+
 def get_video_data():
-    """Get the video data"""
+    """Get the video catalog"""
     return get_global_data()["video_data"]
 
 
+def get_video_metadata():
+    """Get cached YouTube metadata by video ID"""
+    return get_global_data()["video_metadata"]
+
+
 def get_completed_tricks():
-    """Get the completed tricks data"""
-    return get_global_data()["completed_tricks"]
\ No newline at end of file
+    """Get the completed tricks data for the current user"""
+    return {"completed": get_progress_store().get_completed(get_user_id())}
\ No newline at end of file
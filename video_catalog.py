@@ -0,0 +1,188 @@
+import json
+import logging
+import os
+import pickle
+import tempfile
+from dataclasses import dataclass
+
+
+logger = logging.getLogger(__name__)
+
+# Bump when the cached tuple layout changes so stale caches are ignored
+CACHE_VERSION = 2
+
+
+@dataclass(frozen=True, slots=True)
+class VideoClip:
+    """A YouTube clip, with its video ID parsed once at load time"""
+    url: str
+    video_id: str | None
+    start_time: int | None = None
+    end_time: int | None = None
+    name: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class TrickVideos:
+    """All the videos for one trick"""
+    slow_motion: VideoClip | None = None
+    pro_examples: tuple = ()
+    tutorial: VideoClip | None = None
+
+
+# Shared result for tricks that have no videos yet
+NO_VIDEOS = TrickVideos()
+
+
+# Sparse, read-only catalog of the tricks that actually have videos
+class VideoCatalog:
+    """Per-trick video lookups; placeholder entries from the JSON file are not stored"""
+
+    def __init__(self, videos_by_trick):
+        self.videos_by_trick = videos_by_trick
+
+    def __len__(self):
+        return len(self.videos_by_trick)
+
+    def get(self, trick_name):
+        """Get a trick's videos (NO_VIDEOS if it has none)"""
+        return self.videos_by_trick.get(trick_name, NO_VIDEOS)
+
+
+# Function to validate a time field from the JSON file
+def parse_time(value, where):
+    """Check that a start/end time is a whole number of seconds or null"""
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+        raise ValueError(f"{where} must be a non-negative whole number of seconds or null, got {value!r}")
+    return value
+
+
+# Function to validate one clip ({"url", "start_time", "end_time"[, "name"]})
+def parse_clip(entry, where, extract_youtube_id, named=False):
+    """Turn a JSON clip entry into a VideoClip, or None if it's an empty placeholder"""
+    if not isinstance(entry, dict):
+        raise ValueError(f"{where} must be an object, got {type(entry).__name__}")
+
+    url = entry.get("url", "")
+    if not isinstance(url, str):
+        raise ValueError(f"{where}.url must be a string")
+    if not url:
+        return None
+
+    video_id = extract_youtube_id(url)
+    if not video_id:
+        raise ValueError(f"{where}.url is not a YouTube URL: {url}")
+
+    name = entry.get("name")
+    if named and not isinstance(name, str):
+        raise ValueError(f"{where}.name must be a string")
+
+    return VideoClip(
+        url=url,
+        video_id=video_id,
+        start_time=parse_time(entry.get("start_time"), f"{where}.start_time"),
+        end_time=parse_time(entry.get("end_time"), f"{where}.end_time"),
+        name=name
+    )
+
+
+# Function to validate the whole trick_videos.json document
+def parse_video_data(video_data, extract_youtube_id):
+    """Validate the raw JSON and build a VideoCatalog holding only populated entries"""
+    if not isinstance(video_data, dict):
+        raise ValueError("trick_videos.json must contain an object keyed by trick name")
+
+    videos_by_trick = {}
+    for trick_name, entry in video_data.items():
+        if not isinstance(entry, dict):
+            raise ValueError(f"{trick_name} must be an object")
+
+        slow_motion = parse_clip(entry.get("slow_motion", {}), f"{trick_name}.slow_motion", extract_youtube_id)
+
+        pro_examples = entry.get("pro_examples", [])
+        if not isinstance(pro_examples, list):
+            raise ValueError(f"{trick_name}.pro_examples must be a list")
+        pro_clips = tuple(
+            clip for clip in (
+                parse_clip(example, f"{trick_name}.pro_examples[{i}]", extract_youtube_id, named=True)
+                for i, example in enumerate(pro_examples)
+            )
+            if clip is not None
+        )
+
+        tutorial = entry.get("tutorial", "")
+        if not isinstance(tutorial, str):
+            raise ValueError(f"{trick_name}.tutorial must be a string")
+        # Tutorials are played with st.video, which takes any URL, so only YouTube ones get a video ID
+        tutorial_clip = VideoClip(url=tutorial, video_id=extract_youtube_id(tutorial)) if tutorial else None
+
+        # Skip placeholders so memory only grows with real content
+        if slow_motion or pro_clips or tutorial_clip:
+            videos_by_trick[trick_name] = TrickVideos(slow_motion, pro_clips, tutorial_clip)
+
+    return VideoCatalog(videos_by_trick)
+
+
+# Functions to convert the catalog to and from plain tuples for the on-disk cache
+def catalog_to_rows(catalog):
+    def clip_row(clip):
+        return (clip.url, clip.video_id, clip.start_time, clip.end_time, clip.name)
+
+    return [
+        (
+            trick_name,
+            clip_row(videos.slow_motion) if videos.slow_motion else None,
+            [clip_row(clip) for clip in videos.pro_examples],
+            clip_row(videos.tutorial) if videos.tutorial else None
+        )
+        for trick_name, videos in catalog.videos_by_trick.items()
+    ]
+
+
+def catalog_from_rows(rows):
+    return VideoCatalog({
+        trick_name: TrickVideos(
+            VideoClip(*slow_motion) if slow_motion else None,
+            tuple(VideoClip(*clip) for clip in pro_examples),
+            VideoClip(*tutorial) if tutorial else None
+        )
+        for trick_name, slow_motion, pro_examples, tutorial in rows
+    })
+
+
+# Function to load the video catalog, reusing a binary cache while the JSON file is unchanged
+def load_video_catalog(path, extract_youtube_id, cache_path=None):
+    """Load and validate trick_videos.json into a VideoCatalog"""
+    stat = os.stat(path)
+    cache_key = (CACHE_VERSION, os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'rb') as f:
+                cached_key, rows = pickle.load(f)
+            if cached_key == cache_key:
+                return catalog_from_rows(rows)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError):
+            pass  # A bad cache is just rebuilt below
+
+    with open(path, 'r') as f:
+        catalog = parse_video_data(json.load(f), extract_youtube_id)
+
+    if cache_path:
+        # Write to a temp file and swap it in so other workers never read a half-written cache
+        directory = os.path.dirname(os.path.abspath(cache_path))
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((cache_key, catalog_to_rows(catalog)), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            # The cache only saves a parse next time (e.g. the directory is read-only or the disk is full)
+            logger.warning("Could not write the video catalog cache to %s", cache_path, exc_info=True)
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    return catalog
@@ -0,0 +1,212 @@
+"""Fetch YouTube oEmbed metadata for every video in trick_videos.json.
+
+Walks all slow_motion, pro_examples and tutorial URLs, fetches their oEmbed
+metadata (title, channel, thumbnail) concurrently, and stores it in an
+on-disk cache that the app reads at load time. The app never fetches
+metadata itself. Links YouTube no longer serves are reported.
+
+    python video_metadata.py
+    python video_metadata.py --concurrency 64 --ttl-days 1
+    python video_metadata.py --base-url http://127.0.0.1:8765/oembed
+"""
+import argparse
+import asyncio
+import hashlib
+import http.client
+import json
+import os
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+OEMBED_URL = os.environ.get("TRICKY_OEMBED_URL", "https://www.youtube.com/oembed")
+
+# Cache layout: <dir>/<2 hex chars>/<sha256>.json, plus a stamp file touched after every run
+METADATA_CACHE_DIR = ".video_metadata"
+METADATA_STAMP = os.path.join(METADATA_CACHE_DIR, "updated")
+
+# Bump when the entry layout changes; old entries then simply stop matching
+CACHE_VERSION = 1
+
+DEFAULT_TTL_DAYS = 7
+
+# oEmbed answers these for removed, private or unembeddable videos
+UNAVAILABLE_STATUSES = {400, 401, 403, 404}
+
+
+# Function to get where a video's cache entry lives
+def cache_entry_path(cache_dir, video_id):
+    """Content-addressed path: the file name is a hash of what was fetched"""
+    digest = hashlib.sha256(f"{CACHE_VERSION}:{video_id}".encode()).hexdigest()
+    return os.path.join(cache_dir, digest[:2], f"{digest}.json")
+
+
+# Function to read one cache entry
+def read_cache_entry(cache_dir, video_id):
+    """Get a video's cached entry, or None if it isn't cached (or the entry is unreadable)"""
+    try:
+        with open(cache_entry_path(cache_dir, video_id), 'r') as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return entry if entry.get("video_id") == video_id else None
+
+
+# Function to write one cache entry
+def write_cache_entry(cache_dir, entry):
+    path = cache_entry_path(cache_dir, entry["video_id"])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # Write to a temp file and swap it in so the app never reads a half-written entry
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, 'w') as f:
+        json.dump(entry, f)
+    os.replace(tmp_path, path)
+
+
+# Function to load the cached metadata for a set of videos (used by the app; never fetches)
+def load_cached_metadata(video_ids, cache_dir=METADATA_CACHE_DIR):
+    """Map each cached video ID to its entry; videos that were never fetched are left out"""
+    if not os.path.isdir(cache_dir):
+        return {}
+    metadata = {}
+    for video_id in video_ids:
+        entry = read_cache_entry(cache_dir, video_id)
+        if entry is not None:
+            metadata[video_id] = entry
+    return metadata
+
+
+# Function to collect every video in the raw trick_videos.json document
+def collect_videos(video_data, extract_youtube_id):
+    """Return ({video ID: [where it's used]}, [(where, url) for URLs that aren't YouTube links])"""
+    videos = {}
+    invalid = []
+
+    def add(url, where):
+        if not url:
+            return
+        video_id = extract_youtube_id(url)
+        if video_id:
+            videos.setdefault(video_id, []).append(where)
+        else:
+            invalid.append((where, url))
+
+    for trick_name, entry in video_data.items():
+        add(entry.get("slow_motion", {}).get("url", ""), f"{trick_name}.slow_motion")
+        for i, example in enumerate(entry.get("pro_examples", [])):
+            add(example.get("url", ""), f"{trick_name}.pro_examples[{i}]")
+        add(entry.get("tutorial", ""), f"{trick_name}.tutorial")
+    return videos, invalid
+
+
+# Function to fetch one video's oEmbed metadata (blocking; run in a worker thread)
+def fetch_oembed(video_id, base_url, timeout):
+    """Return a cache entry; raises OSError or HTTPException (e.g. a truncated response) for network errors,
+    which are retried on the next run"""
+    watch_url = f"https://www.youtube.com/watch?v={video_id}"
+    request_url = f"{base_url}?{urllib.parse.urlencode({'url': watch_url, 'format': 'json'})}"
+    entry = {"video_id": video_id, "fetched_at": time.time()}
+    try:
+        with urllib.request.urlopen(request_url, timeout=timeout) as response:
+            data = json.load(response)
+    except urllib.error.HTTPError as error:
+        if error.code not in UNAVAILABLE_STATUSES:
+            raise
+        return dict(entry, available=False, status=error.code)
+
+    return dict(
+        entry,
+        available=True,
+        status=200,
+        title=data.get("title"),
+        author_name=data.get("author_name"),
+        thumbnail_url=data.get("thumbnail_url")
+    )
+
+
+# Function to fetch metadata for every video that isn't freshly cached
+async def enrich(video_ids, cache_dir=METADATA_CACHE_DIR, base_url=OEMBED_URL, concurrency=16,
+                 ttl=DEFAULT_TTL_DAYS * 86400, timeout=10):
+    """Return (entries by video ID, {video ID: error} for fetches that failed)"""
+    now = time.time()
+    entries = {}
+    to_fetch = []
+    for video_id in video_ids:
+        entry = read_cache_entry(cache_dir, video_id)
+        if entry is not None and now - entry["fetched_at"] < ttl:
+            entries[video_id] = entry
+        else:
+            to_fetch.append(video_id)
+
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    errors = {}
+
+    # urllib blocks, so requests run on a pool as big as the semaphore; the semaphore
+    # keeps at most `concurrency` requests in flight however many videos there are
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        async def fetch(video_id):
+            async with semaphore:
+                try:
+                    entry = await loop.run_in_executor(executor, fetch_oembed, video_id, base_url, timeout)
+                except (OSError, ValueError, http.client.HTTPException) as error:
+                    errors[video_id] = str(error)
+                    return
+            write_cache_entry(cache_dir, entry)
+            entries[video_id] = entry
+
+        await asyncio.gather(*(fetch(video_id) for video_id in to_fetch))
+
+    # Touch the stamp so running apps pick up the new metadata
+    if to_fetch:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(os.path.join(cache_dir, os.path.basename(METADATA_STAMP)), 'w') as f:
+            f.write(str(time.time()))
+
+    return entries, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--videos", default="trick_videos.json", help="video JSON file to walk")
+    parser.add_argument("--cache-dir", default=METADATA_CACHE_DIR, help="where cached metadata is stored")
+    parser.add_argument("--base-url", default=OEMBED_URL, help="oEmbed endpoint (e.g. a local stub server)")
+    parser.add_argument("--concurrency", type=int, default=16, help="maximum requests in flight")
+    parser.add_argument("--ttl-days", type=float, default=DEFAULT_TTL_DAYS, help="refetch entries older than this")
+    parser.add_argument("--timeout", type=float, default=10, help="per-request timeout, in seconds")
+    args = parser.parse_args()
+
+    # Imported here so --help doesn't pay for loading Streamlit
+    from utils import extract_youtube_id
+
+    with open(args.videos, 'r') as f:
+        videos, invalid = collect_videos(json.load(f), extract_youtube_id)
+
+    start = time.perf_counter()
+    entries, errors = asyncio.run(enrich(
+        videos, cache_dir=args.cache_dir, base_url=args.base_url, concurrency=args.concurrency,
+        ttl=args.ttl_days * 86400, timeout=args.timeout
+    ))
+    elapsed = time.perf_counter() - start
+
+    unavailable = {video_id: entry for video_id, entry in entries.items() if not entry["available"]}
+    for where, url in invalid:
+        print(f"not a YouTube link: {where}: {url}")
+    for video_id, entry in unavailable.items():
+        print(f"unavailable (HTTP {entry['status']}): {video_id} used by {', '.join(videos[video_id])}")
+    for video_id, error in errors.items():
+        print(f"failed to fetch {video_id}: {error}", file=sys.stderr)
+
+    print(f"{len(videos)} videos, {len(entries) - len(unavailable)} available, {len(unavailable)} unavailable, "
+          f"{len(invalid)} invalid links, {len(errors)} failed in {elapsed:.2f}s", file=sys.stderr)
+    return 1 if unavailable or invalid or errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
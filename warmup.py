@@ -0,0 +1,40 @@
+"""Prepare the app's on-disk caches before it starts serving.
+
+Builds the precompiled catalog snapshot, the parsed video cache and the
+progress database (including the one-off JSON migration), so a new replica
+only has to memory-map and unpickle files when its first user connects.
+
+    python warmup.py && streamlit run Home.py
+"""
+import argparse
+import sys
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args()
+
+    start = time.perf_counter()
+    from utils import build_global_data, open_progress_store, warm_up_imports
+    print(f"imports: {time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+    # Building a snapshot writes the catalog snapshot and video cache as it goes
+    step = time.perf_counter()
+    snapshot = build_global_data(0)
+    print(f"global data ({len(snapshot['df_tricks'])} tricks): {time.perf_counter() - step:.2f}s", file=sys.stderr)
+
+    step = time.perf_counter()
+    open_progress_store().close()
+    print(f"progress store: {time.perf_counter() - step:.2f}s", file=sys.stderr)
+
+    # Also byte-compiles the charting stack, so the app's first import of it is quick
+    step = time.perf_counter()
+    warm_up_imports()
+    print(f"charting imports: {time.perf_counter() - step:.2f}s", file=sys.stderr)
+
+    print(f"warm-up done in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()